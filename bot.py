@@ -1,7 +1,7 @@
 import asyncio
 import os
 
-from aiogram import Bot, Dispatcher, types
+from aiogram import Bot, types
 from aiogram.client.bot import DefaultBotProperties
 from aiogram.enums.parse_mode import ParseMode
 
@@ -10,11 +10,18 @@ from dotenv import find_dotenv, load_dotenv
 load_dotenv(find_dotenv())
 
 from middlewares.db import DataBaseSession
+from middlewares.metrics import metrics
+from middlewares.outbound import OutboundQueue
+from states.storage import SQLiteStorage
+from utils.admin_registry import AdminRegistry
+from utils.scheduler import OrderedDispatcher
+from utils.webhook import run_webhook
 
-from database.engine import create_db, drop_db, session_maker
+from database.engine import create_db, drop_db, query_stats, session_maker
 
 from handlers.user_private import user_private_router
 from handlers.user_group import user_group_router
+from handlers.user_inline import user_inline_router
 from handlers.admin import base, cards, players, reports, fsm, controls
 
 
@@ -22,12 +29,35 @@ from handlers.admin import base, cards, players, reports, fsm, controls
 # ALLOWED_UPDATES = ['message', 'edited_message', 'callback_query']
 
 bot = Bot(token=os.getenv('TOKEN'), default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-bot.my_admins_list = []
-
-dp = Dispatcher()
+outbound = OutboundQueue()
+bot.session.middleware(outbound)
+# ADMIN_CHATS — id групп через запятую, админы которых становятся админами бота
+bot.admin_registry = AdminRegistry(
+    os.getenv('ADMINS_FILE', 'admins.json'),
+    allowed_chats=[int(chat_id) for chat_id in os.getenv('ADMIN_CHATS', '').split(',') if chat_id.strip()],
+    ttl=float(os.getenv('ADMINS_TTL', 600)),
+)
+
+# FSM хранится в отдельном файле, чтобы перезапуск не сбрасывал Контроль и добавление карточек
+# Апдейты разных пользователей обрабатываются параллельно, одного — строго по порядку
+dp = OrderedDispatcher(
+    storage=SQLiteStorage(os.getenv('FSM_DB', 'fsm.sqlite3')),
+    workers=int(os.getenv('UPDATE_WORKERS', 8)),
+    drain_timeout=float(os.getenv('UPDATE_DRAIN_TIMEOUT', 10)),
+)
+db_session = DataBaseSession(session_pool=session_maker)
+
+dp.update.middleware(db_session)
+metrics.register(dp)
+metrics.add_gauge('update_queue', lambda: dp.scheduler.stats()['queued'])
+metrics.add_gauge('update_workers_busy', lambda: dp.scheduler.busy)
+metrics.add_gauge('outbound_queue', lambda: outbound.stats()['queued'])
+metrics.add_gauge('db_sessions_opened', lambda: db_session.sessions_opened)
+metrics.add_gauge('db_updates', lambda: db_session.updates)
 
 dp.include_router(user_private_router)
 dp.include_router(user_group_router)
+dp.include_router(user_inline_router)
 
 # dp.include_router(admin_router)
 for router in [base.admin_router, cards.admin_router, players.admin_router, reports.admin_router, fsm.admin_router, controls.admin_router]:
@@ -39,20 +69,46 @@ async def on_startup(bot):
     # await drop_db()
 
     await create_db()
+    bot.admin_registry.start(bot)
+    # Метрики по HTTP только локально и только если задан порт
+    if os.getenv('METRICS_PORT'):
+        await metrics.start_http(os.getenv('METRICS_HOST', '127.0.0.1'), int(os.getenv('METRICS_PORT')))
 
 
 async def on_shutdown(bot):
     print('бот лег')
+    await bot.admin_registry.stop()
+    await metrics.stop_http()
+    print(f'Сессии БД: {db_session.stats()}')
+    print(f'Очередь апдейтов: {dp.scheduler.stats()}')
+    print(f'SQL-запросы:\n{query_stats.dump()}')
 
 
 async def main():
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
 
-    dp.update.middleware(DataBaseSession(session_pool=session_maker))
-
-    await bot.delete_webhook(drop_pending_updates=True)
     await bot.delete_my_commands(scope=types.BotCommandScopeAllPrivateChats())
-    await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
 
-asyncio.run(main())
\ No newline at end of file
+    # Если задан WEBHOOK_URL — принимаем апдейты через вебхук, иначе long polling
+    webhook_url = os.getenv('WEBHOOK_URL')
+    if webhook_url:
+        await run_webhook(
+            dp,
+            bot,
+            url=webhook_url,
+            secret=os.getenv('WEBHOOK_SECRET'),
+            host=os.getenv('WEBHOOK_HOST', '0.0.0.0'),
+            port=int(os.getenv('WEBHOOK_PORT', 8080)),
+            path=os.getenv('WEBHOOK_PATH', '/webhook'),
+            max_tasks=int(os.getenv('WEBHOOK_MAX_TASKS', 100)),
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+    else:
+        await bot.delete_webhook(drop_pending_updates=True)
+        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+
+
+# Запуск только напрямую: при импорте (бенчмарки) бот не стартует
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,190 @@
+# Кэши в памяти процесса. Заполняются из БД один раз, дальше
+# поддерживаются функциями записи из orm_query (write-through).
+import html
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from utils import idset
+from utils.fuzzy import CallsignIndex, fold
+
+
+@dataclass(frozen=True, slots=True)
+class Ref:  # статус или направление: то, что handlers читают как .name
+    id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class RosterEntry:
+    id: int
+    name: str
+    count: int
+    statuses_id: int
+    direction_id: int
+    statuses: Ref
+    direction: Ref
+
+
+class RosterCache:
+    def __init__(self):
+        self.loaded = False
+        self.statuses: dict[int, Ref] = {}
+        self.directions: dict[int, Ref] = {}
+        self._by_name: dict[str, RosterEntry] = {}
+        self._by_id: dict[int, RosterEntry] = {}
+        self.index = CallsignIndex()
+
+    def load(self, statuses, directions, rows):
+        self.statuses = {id_: Ref(id_, name) for id_, name in statuses}
+        self.directions = {id_: Ref(id_, name) for id_, name in directions}
+        self._by_name = {}
+        self._by_id = {}
+        self.index = CallsignIndex()
+        for row in rows:
+            self._put(*row)
+        self.loaded = True
+
+    def clear(self):
+        self.loaded = False
+        self._by_name = {}
+        self._by_id = {}
+        self.index = CallsignIndex()
+
+    def _put(self, id_: int, name: str, count: int, statuses_id: int, direction_id: int):
+        self.index.add(name)
+        self._by_name[name] = self._by_id[id_] = RosterEntry(
+            id=id_,
+            name=name,
+            count=count,
+            statuses_id=statuses_id,
+            direction_id=direction_id,
+            statuses=self.statuses.get(statuses_id) or Ref(statuses_id, "?"),
+            direction=self.directions.get(direction_id) or Ref(direction_id, "?"),
+        )
+
+    # Запись. Пока кэш не загружен — ничего не делаем, он и так прочитает всё из БД.
+    def put(self, id_: int, name: str, count: int, statuses_id: int, direction_id: int):
+        if self.loaded:
+            self._put(id_, name, count, statuses_id, direction_id)
+
+    def put_rows(self, rows):
+        for row in rows:
+            self.put(*row)
+
+    def rename(self, old_name: str, row):
+        if self.loaded:
+            self._by_name.pop(old_name, None)
+            self.index.remove(old_name)
+            self._put(*row)
+
+    def discard(self, name: str):
+        entry = self._by_name.pop(name, None)
+        if entry is not None:
+            self._by_id.pop(entry.id, None)
+        self.index.remove(name)
+
+    # Чтение
+    def get(self, name: str) -> RosterEntry | None:
+        return self._by_name.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def players(self, status_id: int | None = None) -> list[RosterEntry]:
+        entries = sorted(self._by_name.values(), key=lambda e: e.id)
+        if status_id is None:
+            return entries
+        return [e for e in entries if e.statuses_id == status_id]
+
+    def names(self, status_id: int) -> list[str]:
+        return [e.name for e in self.players(status_id)]
+
+    def by_id(self, id_: int) -> RosterEntry | None:
+        return self._by_id.get(id_)
+
+    def mask(self, status_id: int) -> str:
+        return idset.pack(e.id for e in self._by_id.values() if e.statuses_id == status_id)
+
+    def subset(self, mask: idset.Mask) -> "RosterSubset":
+        return RosterSubset(self, mask)
+
+    def suggest(self, query: str, allowed=None, limit: int = 5) -> list[str]:
+        return [name for name, _ in self.index.search(query, limit=limit, allowed=allowed)]
+
+
+class RosterSubset:
+    # Часть состава, заданная битовой маской id: поддерживает `name in subset`
+    __slots__ = ('roster', 'mask')
+
+    def __init__(self, roster: RosterCache, mask: idset.Mask):
+        self.roster = roster
+        self.mask = mask
+
+    def __contains__(self, name: str) -> bool:
+        entry = self.roster.get(name)
+        return entry is not None and idset.contains(self.mask, entry.id)
+
+
+roster = RosterCache()
+
+
+@dataclass(frozen=True, slots=True)
+class CardEntry:
+    id: int
+    name: str
+    image: str
+
+
+class CardCatalog:
+    def __init__(self):
+        self.loaded = False
+        self.text = ""
+        self._by_name: dict[str, CardEntry] = {}
+        # Отсортированные суффиксы свёрнутых названий: (суффикс, смещение, название).
+        # Все названия, содержащие запрос, лежат в одном непрерывном отрезке.
+        self._suffixes: list[tuple[str, int, str]] = []
+
+    def load(self, rows):
+        self._by_name = {name: CardEntry(id_, name, image) for id_, name, image in rows}
+        # Готовый текст списка, чтобы не склеивать его на каждый /start.
+        # Бот шлёт с ParseMode.HTML — «<» или «&» в названии иначе ломают разметку
+        self.text = "\n".join(html.escape(name) for name in self._by_name)
+        self._suffixes = sorted(
+            (folded[offset:], offset, name)
+            for name in self._by_name
+            for folded in (fold(name),)
+            for offset in range(len(folded))
+        )
+        self.loaded = True
+
+    def clear(self):
+        self.loaded = False
+        self.text = ""
+        self._by_name = {}
+        self._suffixes = []
+
+    def get(self, name: str) -> CardEntry | None:
+        return self._by_name.get(name)
+
+    def search(self, query: str) -> list[CardEntry]:
+        # Сначала названия, которые начинаются с запроса, затем содержащие его
+        folded = fold(query)
+        if not folded:
+            return list(self._by_name.values())
+        hits: dict[str, int] = {}
+        for suffix, offset, name in self._suffixes[bisect_left(self._suffixes, (folded,)):]:
+            if not suffix.startswith(folded):
+                break
+            if offset < hits.get(name, offset + 1):
+                hits[name] = offset
+        ranked = sorted(hits, key=lambda name: (hits[name] > 0, hits[name], name))
+        return [self._by_name[name] for name in ranked]
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+
+card_catalog = CardCatalog()
@@ -0,0 +1,49 @@
+# Настройки движка БД из окружения. DB_URL (PostgreSQL через asyncpg) важнее DB_LITE (SQLite):
+# для перехода на Postgres достаточно задать DB_URL, для возврата — убрать его.
+import os
+
+from sqlalchemy.engine import make_url
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def database_url() -> str:
+    url = os.getenv('DB_URL') or os.getenv('DB_LITE')
+    if not url:
+        raise RuntimeError('Не задан адрес БД: DB_URL (PostgreSQL) или DB_LITE (SQLite)')
+    return url
+
+
+def engine_options(url: str) -> dict:
+    options = {'echo': os.getenv('DB_ECHO') == '1'}
+    backend = make_url(url).get_backend_name()
+
+    if backend == 'postgresql':
+        # Пул соединений: постоянные pool_size плюс до max_overflow временных под пиками.
+        # pre_ping отсеивает соединения, которые сервер или прокси закрыли, пока они лежали в пуле.
+        statement_cache = _int('DB_STATEMENT_CACHE', 100)
+        options.update(
+            pool_size=_int('DB_POOL_SIZE', 5),
+            max_overflow=_int('DB_MAX_OVERFLOW', 10),
+            pool_timeout=_float('DB_POOL_TIMEOUT', 30),
+            pool_recycle=_int('DB_POOL_RECYCLE', 1800),
+            pool_pre_ping=True,
+            connect_args={
+                # За pgbouncer в режиме transaction подготовленные запросы не работают — там DB_STATEMENT_CACHE=0
+                'statement_cache_size': statement_cache,
+                'prepared_statement_cache_size': statement_cache,
+                'timeout': _float('DB_CONNECT_TIMEOUT', 10),
+                'command_timeout': _float('DB_COMMAND_TIMEOUT', 30),
+            },
+        )
+    elif backend == 'sqlite':
+        # Один файл и одна запись за раз: пул не настраиваем, только сколько ждать блокировку
+        options['connect_args'] = {'timeout': _float('DB_CONNECT_TIMEOUT', 30)}
+
+    return options
@@ -1,27 +1,39 @@
 import os
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from database.models import Base
-from database.orm_query import orm_create_statuses, orm_create_directions
+from database.cache import card_catalog, roster
+from database.config import database_url, engine_options
+from database.instrumentation import QueryStats
+from database.migrations import migrate
+from database.orm_query import orm_load_card_catalog, orm_load_roster
 
-from common.texts_for_db import statuses, directions
 
+# SQLite или PostgreSQL выбирается по окружению, параметры пула — в database/config.py.
+# echo пишет в лог каждый запрос с параметрами — включается только для отладки (DB_ECHO=1)
+DATABASE_URL = database_url()
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 
-engine = create_async_engine(os.getenv('DB_LITE'), echo=True)
-# engine = create_async_engine(os.getenv('DB_URL'), echo=True)
+query_stats = QueryStats(
+    slow_ms=float(os.getenv('SQL_SLOW_MS', 200)),
+    sample_rate=float(os.getenv('SQL_SAMPLE_RATE', 1)),
+)
+query_stats.attach(engine)
 
 session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def create_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        
+    await migrate(engine)
+
     async with session_maker() as session:
-        await orm_create_statuses(session, statuses)
-        await orm_create_directions(session, directions)
+        await orm_load_roster(session)
+        await orm_load_card_catalog(session)
 
 
 async def drop_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.drop_all)
+    roster.clear()
+    card_catalog.clear()
\ No newline at end of file
@@ -0,0 +1,113 @@
+# Замеры SQL-запросов через события движка вместо echo=True: гистограмма времени
+# на каждый запрос (с привязкой к вызвавшей его orm_* функции), журнал медленных
+# запросов и выборочный замер, если мерить всё слишком дорого.
+import logging
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from utils.histogram import Histogram
+
+logger = logging.getLogger(__name__)
+
+_SPACES = re.compile(r"\s+")
+
+
+def _caller() -> str:
+    # Запрос выполняется в greenlet, запущенном из корутины; ищем ближайшую orm_* функцию
+    # в стеке этой корутины (родительский greenlet), иначе — в текущем
+    parent = getcurrent().parent
+    frame = parent.gr_frame if parent is not None else None
+    while frame is not None:
+        name = frame.f_code.co_name
+        if name.startswith("orm_"):
+            return name
+        frame = frame.f_back
+    return "-"
+
+
+def _short(statement: str, limit: int = 80) -> str:
+    statement = _SPACES.sub(" ", statement).strip()
+    return statement if len(statement) <= limit else statement[:limit - 1] + "…"
+
+
+@dataclass
+class SlowQuery:
+    at: float
+    ms: float
+    caller: str
+    statement: str
+    params: str
+
+
+class QueryStats:
+    def __init__(self, slow_ms: float = 200, sample_rate: float = 1.0, slow_keep: int = 20):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.statements: dict[tuple[str, str], Histogram] = {}  # (orm_*, начало SQL) -> время
+        self.slow: deque[SlowQuery] = deque(maxlen=slow_keep)
+
+    def attach(self, engine: AsyncEngine):
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+        event.listen(engine.sync_engine, "handle_error", self._failed)
+
+    def reset(self):
+        self.statements.clear()
+        self.slow.clear()
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.setdefault("query_started", [])
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            started.append(None)
+        else:
+            started.append(time.perf_counter())
+
+    def _failed(self, context):
+        # after_cursor_execute не будет — убираем отметку времени упавшего запроса
+        if context.connection is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        if started is None:
+            return
+        ms = (time.perf_counter() - started) * 1000
+        caller = _caller()
+        key = (caller, _short(statement))
+        histogram = self.statements.get(key)
+        if histogram is None:
+            histogram = self.statements[key] = Histogram()
+        histogram.observe(ms)
+        if ms >= self.slow_ms:
+            params = _short(repr(parameters), 200)
+            self.slow.append(SlowQuery(time.time(), ms, caller, _short(statement, 500), params))
+            logger.warning("Медленный запрос %.0f мс в %s: %s | %s", ms, caller, _short(statement, 500), params)
+
+    def top(self, limit: int = 15):
+        return sorted(self.statements.items(), key=lambda item: item[1].total, reverse=True)[:limit]
+
+    def dump(self, limit: int = 15) -> str:
+        if not self.statements:
+            return "Запросов не было."
+        lines = [f"{'функция':<28} {'N':>6} {'всего':>8} {'p50':>6} {'p95':>6} {'max':>7}  (мс)"]
+        for (caller, statement), h in self.top(limit):
+            lines.append(
+                f"{caller[:28]:<28} {h.count:>6} {h.total:>8.0f} {h.quantile(0.5):>6.1f} "
+                f"{h.quantile(0.95):>6.1f} {h.max:>7.1f}\n  {statement}"
+            )
+        if self.slow:
+            lines.append(f"\nМедленные (от {self.slow_ms:.0f} мс):")
+            lines.extend(
+                f"{time.strftime('%H:%M:%S', time.localtime(q.at))} {q.ms:.0f} мс {q.caller}: {_short(q.statement, 150)}"
+                for q in self.slow
+            )
+        return "\n".join(lines)
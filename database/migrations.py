@@ -0,0 +1,61 @@
+# Версионирование схемы: номер версии хранится в таблице schema_version,
+# при старте выполняются только недостающие шаги из MIGRATIONS по порядку.
+from sqlalchemy import inspect, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from common.texts_for_db import statuses, directions
+from database.models import Base, Directions, SchemaVersion, Statuses
+
+
+async def _seed(conn: AsyncConnection, model, names: list):
+    if (await conn.execute(select(model.id).limit(1))).first():
+        return
+    await conn.execute(insert(model), [{"name": name} for name in names])
+
+
+async def _baseline(conn: AsyncConnection):
+    await conn.run_sync(Base.metadata.create_all)
+    await _seed(conn, Statuses, statuses)
+    await _seed(conn, Directions, directions)
+
+
+async def _players_fk_indexes(conn: AsyncConnection):
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_players_statuses_id ON players (statuses_id)"))
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_players_direction_id ON players (direction_id)"))
+
+
+async def _players_name_lower_index(conn: AsyncConnection):
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_players_name_lower ON players (lower(name))"))
+
+
+# (версия, шаг). Новые шаги только дописываются в конец.
+MIGRATIONS = [
+    (1, _baseline),
+    (2, _players_fk_indexes),
+    (3, _players_name_lower_index),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def migrate(engine: AsyncEngine) -> bool:
+    # True, если схема менялась
+    async with engine.begin() as conn:
+        await conn.run_sync(SchemaVersion.__table__.create, checkfirst=True)
+        version = (await conn.execute(select(SchemaVersion.version))).scalar()
+        if version == LATEST_VERSION:
+            return False
+
+        if version is None:
+            # Новая БД создаётся сразу в последней версии, старая (до миграций) считается версией 0
+            fresh = not await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("players"))
+            if fresh:
+                await _baseline(conn)
+            version = LATEST_VERSION if fresh else 0
+            await conn.execute(insert(SchemaVersion).values(id=1, version=version))
+
+        for step_version, step in MIGRATIONS:
+            if step_version > version:
+                await step(conn)
+                version = step_version
+        await conn.execute(update(SchemaVersion).values(version=version))
+    return True
@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, ForeignKey, Numeric, String, Text, BigInteger, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, MetaData, Numeric, String, Table, Text, BigInteger, Column, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -36,12 +36,50 @@ class Players(Base):
     name: Mapped[str] = mapped_column(String(150), nullable=False, unique=True)
     count: Mapped[int]
 
-    direction_id: Mapped[int] = mapped_column(ForeignKey('directions.id', ondelete='CASCADE'), nullable=False)
-    statuses_id: Mapped[int] = mapped_column(ForeignKey('statuses.id', ondelete='CASCADE'), nullable=False)
+    direction_id: Mapped[int] = mapped_column(ForeignKey('directions.id', ondelete='CASCADE'), nullable=False, index=True)
+    statuses_id: Mapped[int] = mapped_column(ForeignKey('statuses.id', ondelete='CASCADE'), nullable=False, index=True)
     
     direction: Mapped['Directions'] = relationship(backref='players')
     statuses: Mapped['Statuses'] = relationship(backref='players')
-    
 
 
-    
\ No newline at end of file
+Index('ix_players_name_lower', func.lower(Players.name))
+
+
+class ControlSessions(Base): # одна проведённая сессия актив контроля
+    __tablename__ = 'control_sessions'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    admin_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    attended: Mapped[int] = mapped_column(default=0)
+    absent: Mapped[int] = mapped_column(default=0)
+
+
+class AttendanceEvents(Base): # отметка игрока в сессии, только добавляется
+    __tablename__ = 'attendance_events'
+    __table_args__ = (
+        Index('ix_attendance_events_player_session', 'player_id', 'session_id'),
+        Index('ix_attendance_events_session_attended', 'session_id', 'attended'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    session_id: Mapped[int] = mapped_column(ForeignKey('control_sessions.id', ondelete='CASCADE'), nullable=False)
+    player_id: Mapped[int] = mapped_column(ForeignKey('players.id', ondelete='CASCADE'), nullable=False)
+    attended: Mapped[bool] = mapped_column(nullable=False)
+
+
+class SchemaVersion(Base): # версия схемы БД, одна строка
+    __tablename__ = 'schema_version'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False)
+
+
+# Временная таблица для массовых обновлений по списку id: своя для каждого соединения,
+# в общую схему (create_all) не входит
+player_ids_tmp = Table(
+    'tmp_player_ids',
+    MetaData(),
+    Column('id', Integer, primary_key=True),
+    prefixes=['TEMPORARY'],
+)
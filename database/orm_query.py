@@ -1,8 +1,14 @@
-from sqlalchemy import select, update, delete, func, case
+from sqlalchemy import select, insert, update, delete, func, case, literal
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
 
-from database.models import Cards, Statuses, Directions, Players
+from database.models import (
+    AttendanceEvents, Cards, ControlSessions, Statuses, Directions, Players, player_ids_tmp
+)
+from database.cache import card_catalog, roster
+from utils import idset
+from utils.paginator import KeysetPaginator
+from utils.roster_import import ImportReport
 
 
 
@@ -49,6 +55,18 @@ async def orm_create_directions(session: AsyncSession, categories: list):
 
 ############ Админка: добавить/изменить/удалить карточку ########################
 
+async def orm_load_card_catalog(session: AsyncSession):
+    query = select(Cards.id, Cards.name, Cards.image).order_by(Cards.id)
+    result = await session.execute(query)
+    card_catalog.load(result.all())
+
+
+async def orm_get_card_catalog(session: AsyncSession):
+    if not card_catalog.loaded:
+        await orm_load_card_catalog(session)
+    return card_catalog
+
+
 async def orm_add_card(session: AsyncSession, data: dict):
     obj = Cards(
         name=data["name"],
@@ -56,12 +74,13 @@ async def orm_add_card(session: AsyncSession, data: dict):
     )
     session.add(obj)
     await session.commit()
+    await orm_load_card_catalog(session)
 
 
-async def orm_update_card(session: AsyncSession, name: str, data):
+async def orm_update_card(session: AsyncSession, card_id: int, data):
     query = (
         update(Cards)
-        .where(Cards.name == name)
+        .where(Cards.id == card_id)
         .values(
             name=data["name"],
             image=data["image"],
@@ -69,6 +88,7 @@ async def orm_update_card(session: AsyncSession, name: str, data):
     )
     await session.execute(query)
     await session.commit()
+    await orm_load_card_catalog(session)
 
 
 async def orm_get_cards(session: AsyncSession):
@@ -83,11 +103,40 @@ async def orm_get_card(session: AsyncSession, name: str):
     return result.scalar()
 
 
-async def orm_delete_card(session: AsyncSession, name: int):
-    query = delete(Cards).where(Cards.name == name)
-    await session.execute(query)
+async def orm_get_card_by_id(session: AsyncSession, card_id: int):
+    return await session.get(Cards, card_id)
+
+
+async def orm_get_cards_page(
+    session: AsyncSession, after: int | None = None, before: int | None = None, per_page: int = 30
+):
+    pager = KeysetPaginator(select(Cards.id, Cards.name), Cards.id, Cards.name, per_page)
+    return await pager.get_page(session, after, before)
+
+
+async def orm_delete_card(session: AsyncSession, card_id: int):
+    query = delete(Cards).where(Cards.id == card_id).returning(Cards.name)
+    name = (await session.execute(query)).scalar()
     await session.commit()
-    return True
+    await orm_load_card_catalog(session)
+    return name
+
+
+##################### Кэш состава игроков #####################################
+
+ROSTER_COLUMNS = (Players.id, Players.name, Players.count, Players.statuses_id, Players.direction_id)
+
+
+async def orm_load_roster(session: AsyncSession):
+    statuses = await session.execute(select(Statuses.id, Statuses.name))
+    directions = await session.execute(select(Directions.id, Directions.name))
+    players = await session.execute(select(*ROSTER_COLUMNS))
+    roster.load(statuses.all(), directions.all(), players.all())
+
+
+async def _ensure_roster(session: AsyncSession):
+    if not roster.loaded:
+        await orm_load_roster(session)
 
 
 ##################### Добавляем игрока в БД #####################################
@@ -101,24 +150,103 @@ async def orm_add_player(session: AsyncSession, data: dict):
     )
     session.add(obj)
     await session.commit()
-
-
-async def orm_change_player(session: AsyncSession, player_name: str, data: dict):
+    roster.put(obj.id, obj.name, obj.count, obj.statuses_id, obj.direction_id)
+
+
+async def _insert_players_batch(session: AsyncSession, names: list, report: ImportReport):
+    rows = [{"name": name, "count": 0, "direction_id": 1, "statuses_id": 1} for name in names]
+    query = insert(Players).returning(*ROSTER_COLUMNS)
+    try:
+        created = (await session.execute(query, rows)).all()
+        await session.commit()
+    except IntegrityError:
+        # Кто-то успел добавить часть позывных параллельно — досылаем пачку по одному
+        await session.rollback()
+        created = []
+        for row in rows:
+            try:
+                created.append((await session.execute(query, row)).one())
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                report.conflicted += 1
+    roster.put_rows(created)
+    report.added += len(created)
+
+
+async def orm_bulk_add_players(
+    session: AsyncSession, names, report: ImportReport, batch_size: int = 500
+) -> ImportReport:
+    await _ensure_roster(session)
+    seen = set()
+    batch = []
+    for name in names:
+        if name in seen or name in roster:
+            report.skipped += 1
+            continue
+        seen.add(name)
+        batch.append(name)
+        if len(batch) >= batch_size:
+            await _insert_players_batch(session, batch, report)
+            batch = []
+    if batch:
+        await _insert_players_batch(session, batch, report)
+    return report
+
+
+async def orm_change_player(session: AsyncSession, player_id: int, data: dict):
+    old = roster.by_id(player_id)
     query = (
         update(Players)
-        .where(Players.name == player_name)
+        .where(Players.id == player_id)
         .values(
             name=data["name"])
+        .returning(*ROSTER_COLUMNS)
     )
-    await session.execute(query)
+    rows = (await session.execute(query)).all()
     await session.commit()
+    for row in rows:
+        if old is not None:
+            roster.rename(old.name, row)
+        else:
+            roster.put(*row)
+
 
 
+async def _log_attendance(session: AsyncSession, control_session_id: int, players_filter, attended: bool):
+    # Журнал пишется одним INSERT ... SELECT по тому же условию, что и UPDATE
+    await session.execute(
+        insert(AttendanceEvents.__table__).from_select(
+            ["session_id", "player_id", "attended"],
+            select(literal(control_session_id), Players.id, literal(attended)).where(players_filter),
+        )
+    )
+
 
-async def orm_update_player_plus(session: AsyncSession, player_names: list) -> None:
+# Короткие списки id идут прямо в IN (...). Длинные (отсутствующие на Контроле —
+# почти весь состав) упёрлись бы в лимит параметров SQLite и медленно разбирались бы,
+# поэтому их кладём во временную таблицу и обновляем через подзапрос к ней.
+INLINE_IDS_LIMIT = 500
+
+
+async def _players_filter(session: AsyncSession, player_ids: list):
+    if len(player_ids) <= INLINE_IDS_LIMIT:
+        return Players.id.in_(player_ids)
+    await session.run_sync(
+        lambda sync_session: player_ids_tmp.create(sync_session.connection(), checkfirst=True)
+    )
+    await session.execute(delete(player_ids_tmp))
+    await session.execute(insert(player_ids_tmp), [{"id": player_id} for player_id in player_ids])
+    return Players.id.in_(select(player_ids_tmp.c.id))
+
+
+async def _apply_player_plus(session: AsyncSession, player_ids: list, control_session_id: int):
+    if not player_ids:
+        return []
+    players_filter = await _players_filter(session, player_ids)
     query = (
         update(Players)
-        .where(Players.name.in_(player_names))
+        .where(players_filter)
         .values(
             count=Players.count + 1,
             statuses_id=case(
@@ -126,17 +254,22 @@ async def orm_update_player_plus(session: AsyncSession, player_names: list) -> N
                 else_=Players.statuses_id),
             direction_id=2
         )
+        .returning(*ROSTER_COLUMNS)
+        # Объекты Players в сессии не загружены — синхронизировать нечего
+        .execution_options(synchronize_session=False)
     )
-    await session.execute(query)
-    await session.commit()
-
-
-async def orm_update_player_minus(session: AsyncSession, player_names: list) -> None:
+    rows = (await session.execute(query)).all()
+    await _log_attendance(session, control_session_id, players_filter, attended=False)
+    return rows
 
 
+async def _apply_player_minus(session: AsyncSession, player_ids: list, control_session_id: int):
+    if not player_ids:
+        return []
+    players_filter = await _players_filter(session, player_ids)
     query = (
         update(Players)
-        .where(Players.name.in_(player_names))
+        .where(players_filter)
         .values(
             count=case(
                 (Players.count - 1 < 0, 0),  # если после уменьшения меньше 0 — ставим 0
@@ -145,34 +278,142 @@ async def orm_update_player_minus(session: AsyncSession, player_names: list) ->
                 (Players.count - 1 < 0, 1),  # если после уменьшения меньше 0 — ставим 1
                 else_=3),
         )
+        .returning(*ROSTER_COLUMNS)
+        # Объекты Players в сессии не загружены — синхронизировать нечего
+        .execution_options(synchronize_session=False)
     )
-    await session.execute(query)
-    await session.commit()
+    rows = (await session.execute(query)).all()
+    await _log_attendance(session, control_session_id, players_filter, attended=True)
+    return rows
 
 
 async def orm_get_player(session: AsyncSession, player_names: str):
-    query = select(Players).where(Players.name == player_names).options(joinedload(Players.statuses), joinedload(Players.direction))
-    result = await session.execute(query)
-    return result.scalar()
+    await _ensure_roster(session)
+    return roster.get(player_names)
+
+
+async def orm_get_player_by_id(session: AsyncSession, player_id: int):
+    await _ensure_roster(session)
+    return roster.by_id(player_id)
+
+
+
 
 
+async def orm_find_player(session: AsyncSession, name: str, mask: idset.Mask | None = None):
+    # Точное совпадение, иначе однозначное с точностью до регистра. Похожие буквы
+    # (Вова/Boba) не подставляем — это другой игрок, он попадёт только в подсказки.
+    # mask — битовая маска id, среди которых ищем (utils.idset)
+    await _ensure_roster(session)
+    allowed = roster.subset(mask) if mask is not None else None
+    if name in roster:
+        # Игрок есть, но не в списке (например, в отпуске) — никого другого не подбираем
+        return roster.get(name) if allowed is None or name in allowed else None
+    name = roster.index.resolve(name, allowed)
+    return roster.get(name) if name else None
 
 
+async def orm_suggest_players(session: AsyncSession, name: str, mask: idset.Mask | None = None, limit: int = 5):
+    await _ensure_roster(session)
+    allowed = roster.subset(mask) if mask is not None else None
+    return roster.suggest(name, allowed, limit)
+
+
+async def orm_get_players_mask(session: AsyncSession, status_id: int = 1) -> str:
+    await _ensure_roster(session)
+    return roster.mask(status_id)
+
+
+async def orm_get_player_names(session: AsyncSession, player_ids) -> list:
+    await _ensure_roster(session)
+    names = []
+    for id_ in player_ids:
+        entry = roster.by_id(id_)
+        names.append(entry.name if entry else f"#{id_}")
+    return names
+
 
 async def orm_get_players(session: AsyncSession, status_id: int | None = None):
-    if status_id is None:
-        query = select(Players).options(joinedload(Players.statuses))
-    else:
-        query = select(Players).where(Players.statuses_id == status_id).options(joinedload(Players.statuses), joinedload(Players.direction))
+    await _ensure_roster(session)
+    return roster.players(status_id)
 
-    result = await session.execute(query)
-    return result.scalars().all()
+
+async def orm_get_players_page(
+    session: AsyncSession, after: int | None = None, before: int | None = None, per_page: int = 25
+):
+    pager = KeysetPaginator(select(Players.id, Players.name), Players.id, Players.name, per_page)
+    return await pager.get_page(session, after, before)
 
 
-async def orm_change_status_player(session: AsyncSession, player_name: str, status: int):
+def _report_pager(status_id: int, render, max_chars: int) -> KeysetPaginator:
+    query = (
+        select(Players.id, Players.name, Players.count, Directions.name.label("direction"))
+        .join(Directions, Players.direction_id == Directions.id)
+        .where(Players.statuses_id == status_id)
+    )
+    return KeysetPaginator(query, Players.id, per_page=200, render=render, max_chars=max_chars)
+
+
+async def orm_get_report_page(
+    session: AsyncSession,
+    status_id: int,
+    render,
+    max_chars: int,
+    after: int | None = None,
+    before: int | None = None,
+):
+    return await _report_pager(status_id, render, max_chars).get_page(session, after, before)
+
+
+async def orm_iter_report_pages(session: AsyncSession, status_id: int, render, max_chars: int):
+    async for page in _report_pager(status_id, render, max_chars).iter_pages(session):
+        yield page
+
+
+async def orm_count_players(session: AsyncSession, status_id: int | None = None) -> int:
+    query = select(func.count(Players.id))
+    if status_id is not None:
+        query = query.where(Players.statuses_id == status_id)
+    return (await session.execute(query)).scalar_one()
+
+
+async def orm_get_dashboard(session: AsyncSession) -> dict:
+    # Одна агрегирующая выборка вместо загрузки игроков: сколько игроков
+    # в каждой комбинации статус / направление / счётчик пропусков
+    query = (
+        select(Players.statuses_id, Players.direction_id, Players.count, func.count(Players.id))
+        .group_by(Players.statuses_id, Players.direction_id, Players.count)
+    )
+    rows = (await session.execute(query)).all()
+    statuses = dict((await session.execute(select(Statuses.id, Statuses.name))).all())
+    directions = dict((await session.execute(select(Directions.id, Directions.name))).all())
+
+    by_status = {name: 0 for name in statuses.values()}
+    by_direction = {name: 0 for name in directions.values()}
+    distribution = {}
+    total = count_sum = 0
+    for status_id, direction_id, count, players in rows:
+        status = statuses.get(status_id, "?")
+        direction = directions.get(direction_id, "?")
+        by_status[status] = by_status.get(status, 0) + players
+        by_direction[direction] = by_direction.get(direction, 0) + players
+        distribution[count] = distribution.get(count, 0) + players
+        total += players
+        count_sum += count * players
+
+    return {
+        "total": total,
+        "average": count_sum / total if total else 0,
+        "by_status": by_status,
+        "by_direction": by_direction,
+        "distribution": dict(sorted(distribution.items())),
+    }
+
+
+async def orm_change_status_player(session: AsyncSession, player_id: int, status: int):
     query = (
         update(Players)
-        .where(Players.name == player_name)
+        .where(Players.id == player_id)
         .values(
             statuses_id=status,
             direction_id=case(
@@ -180,22 +421,98 @@ async def orm_change_status_player(session: AsyncSession, player_name: str, stat
                 else_=Players.direction_id
             )
         )
+        .returning(*ROSTER_COLUMNS)
     )
-    await session.execute(query)
+    rows = (await session.execute(query)).all()
     await session.commit()
+    roster.put_rows(rows)
 
 
 async def orm_get_players2(session: AsyncSession):
-    query = select(Players.name).where(Players.statuses_id==1)
-    result = await session.execute(query)
-    return result.scalars().all()
+    await _ensure_roster(session)
+    return roster.names(1)
 
 
-async def orm_delete_player(session: AsyncSession, player_name: str):
-    query = delete(Players).where(Players.name == player_name)
-    await session.execute(query)
+async def orm_delete_player(session: AsyncSession, player_id: int):
+    query = delete(Players).where(Players.id == player_id).returning(Players.name)
+    name = (await session.execute(query)).scalar()
     await session.commit()
-    return True
+    if name is not None:
+        roster.discard(name)
+    return name
 
 
+##################### Журнал актив контроля #####################################
+
+async def orm_create_control_session(
+    session: AsyncSession, admin_id: int | None, attended: int, absent: int
+) -> int:
+    # Без commit: сессия фиксируется вместе с обновлением счётчиков
+    obj = ControlSessions(admin_id=admin_id, attended=attended, absent=absent)
+    session.add(obj)
+    await session.flush()
+    return obj.id
+
+
+async def orm_apply_control_session(
+    session: AsyncSession, admin_id: int | None, present_ids: list, absent_ids: list
+) -> dict:
+    # Запись сессии, счётчики пропустивших и присутствовавших и журнал — одна транзакция,
+    # один commit. Кэш состава обновляется только после успешного commit.
+    await _ensure_roster(session)
+    control_session_id = await orm_create_control_session(
+        session, admin_id, len(present_ids), len(absent_ids)
+    )
+    absent_rows = await _apply_player_plus(session, absent_ids, control_session_id)
+    present_rows = await _apply_player_minus(session, present_ids, control_session_id)
+    await session.commit()
+
+    # Переходы статусов считаем по кэшу до обновления — без лишних запросов
+    transitions: dict[tuple[str, str], int] = {}
+    for row in (*absent_rows, *present_rows):
+        before = roster.by_id(row.id)
+        if before is not None and before.statuses_id != row.statuses_id:
+            after = roster.statuses.get(row.statuses_id)
+            key = (before.statuses.name, after.name if after else str(row.statuses_id))
+            transitions[key] = transitions.get(key, 0) + 1
+    roster.put_rows(absent_rows)
+    roster.put_rows(present_rows)
+
+    return {
+        "session_id": control_session_id,
+        "attended": len(present_rows),
+        "absent": len(absent_rows),
+        "transitions": transitions,
+    }
+
+
+async def orm_get_control_session(session: AsyncSession, control_session_id: int):
+    query = select(ControlSessions).where(ControlSessions.id == control_session_id)
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
+
 
+async def orm_get_player_history(session: AsyncSession, player_id: int, limit: int = 10):
+    query = (
+        select(ControlSessions.id, ControlSessions.created, AttendanceEvents.attended)
+        .join(ControlSessions, AttendanceEvents.session_id == ControlSessions.id)
+        .where(AttendanceEvents.player_id == player_id)
+        .order_by(AttendanceEvents.session_id.desc())
+        .limit(limit)
+    )
+    result = await session.execute(query)
+    return result.all()
+
+
+async def orm_get_session_attendees(session: AsyncSession, control_session_id: int):
+    query = (
+        select(Players.name)
+        .join(AttendanceEvents, AttendanceEvents.player_id == Players.id)
+        .where(
+            AttendanceEvents.session_id == control_session_id,
+            AttendanceEvents.attended.is_(True),
+        )
+        .order_by(Players.name)
+    )
+    result = await session.execute(query)
+    return result.scalars().all()
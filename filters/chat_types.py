@@ -14,4 +14,4 @@ class IsAdmin(Filter):
         pass
 
     async def __call__(self, message: types.Message, bot: Bot) -> bool:
-        return message.from_user.id in bot.my_admins_list
\ No newline at end of file
+        return message.from_user.id in bot.admin_registry
\ No newline at end of file
@@ -1,5 +1,10 @@
+import html
+
 from aiogram import Router, types
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
+
+from database.engine import query_stats
+from middlewares.metrics import metrics
 from filters.chat_types import ChatTypeFilter, IsAdmin
 from kbds.reply import get_keyboard, del_reply_kd
 
@@ -18,3 +23,23 @@ async def admin_on(message: types.Message):
 @admin_router.message(Command("off"))
 async def admin_off(message: types.Message):
     await message.answer("Админ клавиатура удалена", reply_markup=del_reply_kd)
+
+
+# Статистика SQL-запросов: /sql — сводка, /sql reset — начать заново
+@admin_router.message(Command("sql"))
+async def sql_stats(message: types.Message, command: CommandObject):
+    if command.args == "reset":
+        query_stats.reset()
+        await message.answer("Статистика запросов сброшена.")
+        return
+    await message.answer(f"<pre>{html.escape(query_stats.dump()[:3500])}</pre>")
+
+
+# Время хендлеров и нагрузка: /stats — сводка, /stats reset — начать заново
+@admin_router.message(Command("stats"))
+async def handler_stats(message: types.Message, command: CommandObject):
+    if command.args == "reset":
+        metrics.reset()
+        await message.answer("Статистика хендлеров сброшена.")
+        return
+    await message.answer(f"<pre>{html.escape(metrics.summary()[:3500])}</pre>")
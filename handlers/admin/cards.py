@@ -1,12 +1,15 @@
+import html
+
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.orm_query import (
-    orm_get_cards,
+    orm_get_cards_page,
     orm_get_card,
+    orm_get_card_by_id,
     orm_delete_card,
 )
-from kbds.inline import get_callback_btns
+from kbds.inline import CardCallBack, PageCallBack, get_callback_btns, get_page_btns
 from states.admin_states import AddCard
 
 from filters.chat_types import ChatTypeFilter, IsAdmin
@@ -25,14 +28,33 @@ async def admin_cards(message: types.Message):
     )
 
 
+def cards_page_text(page) -> str:
+    text = "\n".join(html.escape(card.name) for card in page.items)
+    return f"Вот список карточек:\n\n{text}"
+
+
 @admin_router.callback_query(F.data == "card-list")
 async def list_of_cards(callback: types.CallbackQuery, session: AsyncSession):
-    cards = await orm_get_cards(session)
-    if not cards:
+    page = await orm_get_cards_page(session)
+    if not page.items:
         await callback.message.answer("Список карточек пуст.")
         return
-    text = "\n".join(card.name for card in cards)
-    await callback.message.answer(f"Вот список карточек:\n\n{text}")
+    await callback.message.answer(
+        cards_page_text(page),
+        reply_markup=get_page_btns(list_name="cards", page=page),
+    )
+
+
+@admin_router.callback_query(PageCallBack.filter(F.list == "cards"))
+async def cards_page(
+    callback: types.CallbackQuery, callback_data: PageCallBack, session: AsyncSession
+):
+    page = await orm_get_cards_page(session, callback_data.after, callback_data.before)
+    await callback.message.edit_text(
+        cards_page_text(page),
+        reply_markup=get_page_btns(list_name="cards", page=page),
+    )
+    await callback.answer()
 
 
 @admin_router.message(F.text.startswith("card_"))
@@ -44,13 +66,13 @@ async def card_show(message: types.Message, session: AsyncSession):
         return
     keyboard = get_callback_btns(
         btns={
-            "Редактировать": f"change-card_{card.name}",
-            "Удалить": f"delete_{card.name}",
+            "Редактировать": CardCallBack(action="change", card_id=card.id).pack(),
+            "Удалить": CardCallBack(action="delete", card_id=card.id).pack(),
         },
         sizes=(2,),
     )
     await message.answer_photo(
-        photo=card.image, caption=card.name, reply_markup=keyboard
+        photo=card.image, caption=html.escape(card.name), reply_markup=keyboard
     )
 
 
@@ -63,21 +85,29 @@ async def add_card(callback: types.CallbackQuery, state: FSMContext):
     )
 
 
-@admin_router.callback_query(F.data.startswith("delete_"))
-async def delete_card(callback: types.CallbackQuery, session: AsyncSession):
-    name = callback.data.removeprefix("delete_")
-    success = await orm_delete_card(session, name)
+@admin_router.callback_query(CardCallBack.filter(F.action == "delete"))
+async def delete_card(
+    callback: types.CallbackQuery, callback_data: CardCallBack, session: AsyncSession
+):
+    name = await orm_delete_card(session, callback_data.card_id)
     await callback.message.answer(
-        f"Карточка '{name}' {'удалена.' if success else 'не найдена или не удалена.'}"
+        f"Карточка '{name}' удалена." if name else "Карточка не найдена или не удалена."
     )
 
 
-@admin_router.callback_query(F.data.startswith("change-card_"))
+@admin_router.callback_query(CardCallBack.filter(F.action == "change"))
 async def start_edit_card(
-    callback: types.CallbackQuery, state: FSMContext, session: AsyncSession
+    callback: types.CallbackQuery,
+    callback_data: CardCallBack,
+    state: FSMContext,
+    session: AsyncSession,
 ):
-    name = callback.data.split("_")[-1]
-    card = await orm_get_card(session, name)
-    await state.update_data(item_for_change=card, original_key=name)
+    card = await orm_get_card_by_id(session, callback_data.card_id)
+    if not card:
+        await callback.message.answer("Карточка не найдена.")
+        return
+    await state.update_data(
+        item_for_change={"name": card.name, "image": card.image}, original_key=card.id
+    )
     await callback.message.answer("Введите новое название карточки:")
     await state.set_state(AddCard.name)
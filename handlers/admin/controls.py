@@ -1,3 +1,5 @@
+import html
+
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
@@ -5,14 +7,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.fsm.state import State, StatesGroup
 
 from database.orm_query import (
-    orm_get_players2,
-    orm_update_player_plus,
-    orm_update_player_minus,
+    orm_apply_control_session,
+    orm_find_player,
+    orm_get_control_session,
+    orm_get_session_attendees,
+    orm_get_player_names,
+    orm_get_players_mask,
+    orm_suggest_players,
 )
 from kbds.inline import get_callback_btns
 from kbds.reply import get_keyboard
 
 from filters.chat_types import ChatTypeFilter, IsAdmin
+from utils import idset
+from utils.roster_import import split_names
 
 admin_router = Router()
 admin_router.message.filter(ChatTypeFilter(["private"]), IsAdmin())
@@ -30,11 +38,14 @@ class ActivControlFSM(StatesGroup):
 async def start_control(
     message: types.Message, state: FSMContext, session: AsyncSession
 ):
-    players = await orm_get_players2(session)
-    await state.update_data(all_players=players, selected=[], result=[])
+    # Состав храним битовой маской id, отмеченных — списком id в порядке ввода
+    roster = await orm_get_players_mask(session)
+    await state.update_data(roster=roster, selected=[])
 
     await message.answer(
-        "Введите позывной активного игрока", reply_markup=types.ReplyKeyboardRemove()
+        "Введите позывной активного игрока или вставьте весь список "
+        "(с новой строки или через запятую)",
+        reply_markup=types.ReplyKeyboardRemove(),
     )
     await state.set_state(ActivControlFSM.name)
 
@@ -47,43 +58,106 @@ async def cancel_control(message: types.Message, state: FSMContext):
     await message.answer("Действия отменены", reply_markup=ADMIN_KB)
 
 
+async def _list_names(session: AsyncSession, text: str) -> list[str]:
+    # Строка, которая целиком — позывной из базы («Bra,vo»), по запятым не делится
+    names = []
+    for line in text.splitlines():
+        parts = split_names(line)
+        if len(parts) > 1:
+            player = await orm_find_player(session, line.strip())
+            if player is not None:
+                parts = [player.name]
+        names.extend(parts)
+    return names
+
+
+def _names_line(names: list, limit: int = 1000) -> str:
+    # Имена — сырой ввод админа, а бот шлёт HTML: экранируем до обрезки
+    text = ", ".join(html.escape(name) for name in names)
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(", ", 1)[0]
+    return f"{cut} …и ещё {len(names) - cut.count(', ') - 1}"
+
+
+# ✅ Весь список одним сообщением
+@admin_router.message(ActivControlFSM.name, F.text.regexp(r"[,;\n]", mode="search"))
+async def add_players_list(
+    message: types.Message, state: FSMContext, session: AsyncSession
+):
+    data = await state.get_data()
+    roster = idset.unpack(data["roster"])
+    selected = data.get("selected", [])
+    already = set(selected)
+
+    matched, matched_names, unknown, duplicate = [], [], [], []
+    for name in await _list_names(session, message.text):
+        player = await orm_find_player(session, name, roster)
+        if player is None:
+            suggestions = await orm_suggest_players(session, name, roster, limit=1)
+            unknown.append(f"{name} (→ {suggestions[0]}?)" if suggestions else name)
+        elif player.id in already:
+            duplicate.append(player.name)
+        else:
+            matched.append(player.id)
+            matched_names.append(player.name)
+            already.add(player.id)
+
+    if matched:
+        await state.update_data(selected=selected + matched)
+
+    text = f"Добавлено: {len(matched)}\n{_names_line(matched_names)}\n"
+    if unknown:
+        text += f"\nНет в базе (или не в статусе Норма): {len(unknown)}\n{_names_line(unknown)}\n"
+    if duplicate:
+        text += f"\nПовторы: {len(duplicate)}\n{_names_line(duplicate)}\n"
+    text += f"\nВсего отмечено: {len(selected) + len(matched)}. Введите ещё или нажмите кнопку."
+
+    await message.answer(
+        text,
+        reply_markup=get_callback_btns(
+            btns={"Завершить": "+", "Отменить всё": "cancel_activ"}, sizes=(2,)
+        ),
+    )
+
+
 # ✅ Добавление игрока
 @admin_router.message(ActivControlFSM.name, F.text)
-async def add_player(message: types.Message, state: FSMContext):
+async def add_player(message: types.Message, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
-    player = message.text
+    roster = idset.unpack(data["roster"])
+    player = await orm_find_player(session, message.text.strip(), roster)
 
-    if player in data["all_players"]:
+    if player:
         selected = data.get("selected", [])
-        if player not in selected:
-            selected.append(player)
+        if player.id not in selected:
+            selected.append(player.id)
             await state.update_data(selected=selected)
 
         await message.answer(
-            "Игрок добавлен. Введите ещё или нажмите кнопку.",
+            f"Игрок {html.escape(player.name)} добавлен. Введите ещё или нажмите кнопку.",
             reply_markup=get_callback_btns(
                 btns={"Завершить": "+", "Отменить всё": "cancel_activ"}, sizes=(2,)
             ),
         )
     else:
-        await message.answer("Такого игрока нет в базе. Возможно он в отпуске или его нужно выгнать")
+        text = "Такого игрока нет в базе. Возможно он в отпуске или его нужно выгнать"
+        suggestions = await orm_suggest_players(session, message.text, roster)
+        if suggestions:
+            text += "\n\nВозможно, вы имели в виду: " + _names_line(suggestions)
+        await message.answer(text)
 
 
 # ✅ Показать список и предложить удалить
 @admin_router.callback_query(F.data == "+")
 async def show_selected(
-    callback: types.CallbackQuery, state: FSMContext):
+    callback: types.CallbackQuery, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
-    selected = data.get("selected", [])
-    all_players = data.get("all_players", [])
-
-    # Вычисляем result
-    result = [p for p in all_players if p not in selected]
-    await state.update_data(result=result)
+    names = await orm_get_player_names(session, data.get("selected", []))
 
     text = "Список активных игроков:\n\n"
-    for idx, name in enumerate(selected):
-        text += f"[{idx}] {name}\n"
+    for idx, name in enumerate(names):
+        text += f"[{idx}] {html.escape(name)}\n"
     text += "\nЕсли нужно убрать игрока — введите его номер."
 
     await callback.message.answer(
@@ -97,7 +171,7 @@ async def show_selected(
 
 # ✅ Удалить игрока из списка
 @admin_router.message(ActivControlFSM.id)
-async def remove_player(message: types.Message, state: FSMContext):
+async def remove_player(message: types.Message, state: FSMContext, session: AsyncSession):
     index = int(message.text)
     data = await state.get_data()
     selected = data.get("selected", [])
@@ -105,8 +179,9 @@ async def remove_player(message: types.Message, state: FSMContext):
     if 0 <= index < len(selected):
         removed = selected.pop(index)
         await state.update_data(selected=selected)
+        removed_name, = await orm_get_player_names(session, [removed])
         await message.answer(
-            f"Игрок {removed} удалён. Введите ещё или нажмите кнопку.",
+            f"Игрок {html.escape(removed_name)} удалён. Введите ещё или нажмите кнопку.",
             reply_markup=get_callback_btns(
                 btns={"Завершить": "+", "Отменить всё": "cancel_activ"}, sizes=(2,)
             ),
@@ -122,8 +197,38 @@ async def perform_control(
     callback: types.CallbackQuery, state: FSMContext, session: AsyncSession
 ):
     data = await state.get_data()
-    await orm_update_player_plus(session, data["result"])
-    await orm_update_player_minus(session, data["selected"])
+    selected = data["selected"]
+    # Отсутствующие — разность множеств: весь состав минус отмеченные
+    absent = list(idset.iter_ids(idset.difference(idset.unpack(data["roster"]), selected)))
+
+    result = await orm_apply_control_session(session, callback.from_user.id, selected, absent)
 
     await state.clear()
-    await callback.message.answer("Данные обновлены.", reply_markup=ADMIN_KB)
+    text = (
+        f"Данные обновлены. Сессия №{result['session_id']}: "
+        f"были {result['attended']}, пропустили {result['absent']}.\n"
+    )
+    for (before, after), count in result["transitions"].items():
+        text += f"{before} → {after}: {count}\n"
+    text += f"\nСписок присутствовавших: session_{result['session_id']}"
+    await callback.message.answer(text, reply_markup=ADMIN_KB)
+
+
+# ✅ Кто был на сессии
+@admin_router.message(F.text.startswith("session_"))
+async def show_session(message: types.Message, session: AsyncSession):
+    try:
+        control_session_id = int(message.text.removeprefix("session_"))
+    except ValueError:
+        await message.answer("Неверный номер сессии.")
+        return
+    control_session = await orm_get_control_session(session, control_session_id)
+    if not control_session:
+        await message.answer(f"Сессия №{control_session_id} не найдена.")
+        return
+    names = await orm_get_session_attendees(session, control_session_id)
+    text = (
+        f"Сессия №{control_session.id} от {control_session.created:%d.%m.%Y %H:%M}\n"
+        f"Были: {control_session.attended}, пропустили: {control_session.absent}\n\n"
+    )
+    await message.answer(text + _names_line(names, 3500))
@@ -1,4 +1,4 @@
-from aiogram import Router, types, F
+from aiogram import Bot, Router, types, F
 from aiogram.filters import StateFilter, or_f
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.exc import IntegrityError
@@ -6,10 +6,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database.orm_query import (
     orm_add_card,
     orm_add_player,
+    orm_bulk_add_players,
     orm_change_player,
     orm_update_card,
 )
-from states.admin_states import AddCard, AddUser
+from states.admin_states import AddCard, AddUser, ImportUsers
+from utils.roster_import import ImportReport, iter_callsigns, iter_csv_names, iter_file_lines, iter_names
 from kbds.reply import get_keyboard
 
 from filters.chat_types import ChatTypeFilter, IsAdmin
@@ -95,6 +97,29 @@ async def handle_card_image(message: types.Message, state: FSMContext, session:
     await save_entity(AddCard, message, state, session)
 
 
+@admin_router.message(ImportUsers.names, or_f(F.document, F.text))
+async def handle_players_import(
+    message: types.Message, state: FSMContext, session: AsyncSession, bot: Bot
+):
+    report = ImportReport()
+    if message.document:
+        file_name = (message.document.file_name or "").lower()
+        if not file_name.endswith((".txt", ".csv")):
+            await message.answer("Поддерживаются только файлы .txt и .csv.")
+            return
+        file = await bot.download(message.document)
+        lines = iter_file_lines(file)
+        names = iter_csv_names(lines) if file_name.endswith(".csv") else iter_names(lines)
+    else:
+        names = iter_names(message.text.splitlines())
+
+    names = iter_callsigns(names, report)
+
+    await orm_bulk_add_players(session, names, report)
+    await state.clear()
+    await message.answer(report.text(), reply_markup=ADMIN_KB)
+
+
 async def save_entity(state_group, message, state, session):
     data = await state.get_data()
     item_for_change = data.get("item_for_change")
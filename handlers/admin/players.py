@@ -1,14 +1,19 @@
+import html
+
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.orm_query import (
-    orm_get_players,
-    orm_get_player,
+    orm_get_players_page,
+    orm_get_player_by_id,
+    orm_get_player_history,
+    orm_find_player,
+    orm_suggest_players,
     orm_delete_player,
     orm_change_status_player,
 )
-from kbds.inline import get_callback_btns
-from states.admin_states import AddUser
+from kbds.inline import PageCallBack, PlayerCallBack, get_callback_btns, get_page_btns
+from states.admin_states import AddUser, ImportUsers
 
 from filters.chat_types import ChatTypeFilter, IsAdmin
 
@@ -21,41 +26,89 @@ async def admin_players(message: types.Message):
     await message.answer(
         "Для подробного просмотра игрока введите player_Позывной",
         reply_markup=get_callback_btns(
-            btns={"Новый игрок": "add-new-player", "Список игроков": "players-list"},
-            sizes=(2,),
+            btns={
+                "Новый игрок": "add-new-player",
+                "Список игроков": "players-list",
+                "Импорт списком": "import-players",
+            },
+            sizes=(2, 1),
         ),
     )
 
 
+def players_page_text(page) -> str:
+    text = "\n".join(html.escape(player.name) for player in page.items)
+    return f"Вот список игроков:\n\n{text}"
+
+
 @admin_router.callback_query(F.data == "players-list")
 async def list_of_players(callback: types.CallbackQuery, session: AsyncSession):
-    players = await orm_get_players(session)
-    if not players:
+    page = await orm_get_players_page(session)
+    if not page.items:
         await callback.message.answer("Список игроков пуст.")
         return
-    text = "\n".join(player.name for player in players)
-    await callback.message.answer(f"Вот список игроков:\n\n{text}")
+    await callback.message.answer(
+        players_page_text(page),
+        reply_markup=get_page_btns(list_name="players", page=page),
+    )
+
+
+@admin_router.callback_query(PageCallBack.filter(F.list == "players"))
+async def players_page(
+    callback: types.CallbackQuery, callback_data: PageCallBack, session: AsyncSession
+):
+    page = await orm_get_players_page(session, callback_data.after, callback_data.before)
+    await callback.message.edit_text(
+        players_page_text(page),
+        reply_markup=get_page_btns(list_name="players", page=page),
+    )
+    await callback.answer()
 
 
 @admin_router.message(F.text.startswith("player_"))
 async def show_player_info(message: types.Message, session: AsyncSession):
     player_name = message.text.removeprefix("player_")
-    player = await orm_get_player(session, player_name)
+    player = await orm_find_player(session, player_name)
     if not player:
-        await message.answer(f"Игрок с позывным '{player_name}' не найден.")
+        text = f"Игрок с позывным '{html.escape(player_name)}' не найден."
+        suggestions = await orm_suggest_players(session, player_name)
+        if suggestions:
+            text += "\n\nВозможно:\n" + "\n".join(f"player_{html.escape(name)}" for name in suggestions)
+        await message.answer(text)
         return
-    text = f"{player.name} | {player.count} | {player.direction.name} | {player.statuses.name}."
+    text = f"{html.escape(player.name)} | {player.count} | {player.direction.name} | {player.statuses.name}."
     keyboard = get_callback_btns(
         btns={
-            "🔄 позывной": f"change-player_{player.name}",
-            "🔄 статус": f"change-status_{player.name}",
-            "❌ Удалить": f"delete-player_{player.name}",
+            "🔄 позывной": PlayerCallBack(action="change", player_id=player.id).pack(),
+            "🔄 статус": PlayerCallBack(action="status", player_id=player.id).pack(),
+            "📜 история": PlayerCallBack(action="history", player_id=player.id).pack(),
+            "❌ Удалить": PlayerCallBack(action="delete", player_id=player.id).pack(),
         },
-        sizes=(2, 1),
+        sizes=(2, 2),
     )
     await message.answer(text, reply_markup=keyboard)
 
 
+@admin_router.callback_query(PlayerCallBack.filter(F.action == "history"))
+async def player_history(
+    callback: types.CallbackQuery, callback_data: PlayerCallBack, session: AsyncSession
+):
+    player = await orm_get_player_by_id(session, callback_data.player_id)
+    if not player:
+        await callback.message.answer("Игрок не найден.")
+        return
+    history = await orm_get_player_history(session, player.id)
+    if not history:
+        await callback.message.answer(f"У игрока {html.escape(player.name)} ещё нет отметок.")
+        return
+    lines = "\n".join(
+        f"№{session_id} | {created:%d.%m.%Y} | {'был' if attended else 'пропуск'}"
+        for session_id, created, attended in history
+    )
+    await callback.message.answer(f"Последние сессии {html.escape(player.name)}:\n\n{lines}")
+    await callback.answer()
+
+
 @admin_router.callback_query(F.data == "add-new-player")
 async def add_new_player(callback: types.CallbackQuery, state: FSMContext):
     await state.clear()
@@ -65,17 +118,30 @@ async def add_new_player(callback: types.CallbackQuery, state: FSMContext):
     )
 
 
-@admin_router.callback_query(F.data.startswith("change-player_"))
+@admin_router.callback_query(F.data == "import-players")
+async def import_players(callback: types.CallbackQuery, state: FSMContext):
+    await state.clear()
+    await state.set_state(ImportUsers.names)
+    await callback.message.answer(
+        "Отправьте список позывных (каждый с новой строки или через запятую) "
+        "либо файл .txt/.csv",
+        reply_markup=types.ReplyKeyboardRemove(),
+    )
+
+
+@admin_router.callback_query(PlayerCallBack.filter(F.action == "change"))
 async def change_player_name(
-    callback: types.CallbackQuery, state: FSMContext, session: AsyncSession
+    callback: types.CallbackQuery,
+    callback_data: PlayerCallBack,
+    state: FSMContext,
+    session: AsyncSession,
 ):
-    player_name = callback.data.removeprefix("change-player_")
-    player = await orm_get_player(session, player_name)
+    player = await orm_get_player_by_id(session, callback_data.player_id)
     if not player:
-        await callback.message.answer(f"Игрок '{player_name}' не найден.")
+        await callback.message.answer("Игрок не найден.")
         return
 
-    await state.update_data(item_for_change=player, original_key=player_name)
+    await state.update_data(item_for_change={"name": player.name}, original_key=player.id)
 
     await state.set_state(AddUser.name)
     await callback.message.answer(
@@ -83,22 +149,24 @@ async def change_player_name(
     )
 
 
-@admin_router.callback_query(F.data.startswith("change-status_"))
-async def change_player_status(callback: types.CallbackQuery, session: AsyncSession):
-    player_name = callback.data.removeprefix("change-status_")
-    player = await orm_get_player(session, player_name)
+@admin_router.callback_query(PlayerCallBack.filter(F.action == "status"))
+async def change_player_status(
+    callback: types.CallbackQuery, callback_data: PlayerCallBack, session: AsyncSession
+):
+    player = await orm_get_player_by_id(session, callback_data.player_id)
     if not player:
-        await callback.message.answer(f"Игрок '{player_name}' не найден.")
+        await callback.message.answer("Игрок не найден.")
         return
     new_status = 2 if player.statuses_id == 1 else 1
-    await orm_change_status_player(session, player_name, new_status)
+    await orm_change_status_player(session, player.id, new_status)
     await callback.answer("Статус обновлён")
 
 
-@admin_router.callback_query(F.data.startswith("delete-player_"))
-async def delete_player(callback: types.CallbackQuery, session: AsyncSession):
-    player_name = callback.data.removeprefix("delete-player_")
-    success = await orm_delete_player(session, player_name)
+@admin_router.callback_query(PlayerCallBack.filter(F.action == "delete"))
+async def delete_player(
+    callback: types.CallbackQuery, callback_data: PlayerCallBack, session: AsyncSession
+):
+    name = await orm_delete_player(session, callback_data.player_id)
     await callback.message.answer(
-        f"Игрок '{player_name}' {'удалён.' if success else 'не найден или не удалён.'}"
+        f"Игрок '{html.escape(name)}' удалён." if name else "Игрок не найден или не удалён."
     )
@@ -1,7 +1,15 @@
+import html
+
 from aiogram import Router, types, F
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.orm_query import orm_get_players, orm_get_status
-from kbds.inline import get_callback_btns
+from database.orm_query import (
+    orm_count_players,
+    orm_get_dashboard,
+    orm_get_report_page,
+    orm_get_status,
+    orm_iter_report_pages,
+)
+from kbds.inline import PageCallBack, get_callback_btns, get_page_btns
 
 from filters.chat_types import ChatTypeFilter, IsAdmin
 
@@ -13,11 +21,72 @@ async def admin_reports(message: types.Message):
     await message.answer(
         "Выберите вариант",
         reply_markup=get_callback_btns(
-            btns={"Норма": "report_1", "Отпуска": "report_2", "Казнь": "report_3"},
-            sizes=(1, 2)
+            btns={
+                "Норма": "report_1",
+                "Отпуска": "report_2",
+                "Казнь": "report_3",
+                "📊 Сводка": "dashboard",
+            },
+            sizes=(1, 2, 1)
         )
     )
 
+
+@admin_router.callback_query(F.data == "dashboard")
+async def dashboard(callback: types.CallbackQuery, session: AsyncSession):
+    stats = await orm_get_dashboard(session)
+    text = f"📊 Сводка по личному составу\nВсего игроков: {stats['total']}\n\nПо статусам:\n"
+    text += "\n".join(f"{name}: {count}" for name, count in stats["by_status"].items())
+    text += "\n\nПо направлениям:\n"
+    text += "\n".join(f"{name}: {count}" for name, count in stats["by_direction"].items())
+    text += f"\n\nСреднее пропусков: {stats['average']:.2f}\nРаспределение пропусков:\n"
+    text += "\n".join(f"{count}: {players}" for count, players in stats["distribution"].items())
+    await callback.message.answer(text)
+    await callback.answer()
+
+
+MESSAGE_LIMIT = 4096
+
+
+def report_line(p) -> str:
+    return f"{html.escape(p.name)} | {p.count} | {p.direction}"
+
+
+async def report_header(session: AsyncSession, status_id: int) -> str | None:
+    status = await orm_get_status(session, status_id)
+    if not status:
+        return None
+    total = await orm_count_players(session, status_id)
+    return f"📝 Отчёт по личному составу\nСтатус: {status.name}\nВсего: {total}\n\n"
+
+
+def report_keyboard(page, status_id: int):
+    return get_page_btns(
+        list_name="report",
+        page=page,
+        status=status_id,
+        btns={"📄 Весь отчёт": PageCallBack(list="report-all", status=status_id).pack()},
+    )
+
+
+async def send_report_page(callback, session, status_id: int, after=None, before=None, edit=False):
+    header = await report_header(session, status_id)
+    if header is None:
+        await callback.message.answer("Такого статуса нет.")
+        return
+    page = await orm_get_report_page(
+        session, status_id, report_line, MESSAGE_LIMIT - len(header), after, before
+    )
+    if not page.items:
+        await callback.message.answer(header + "Нет игроков с этим статусом.")
+        return
+    text = header + "\n".join(report_line(p) for p in page.items)
+    if edit:
+        await callback.message.edit_text(text, reply_markup=report_keyboard(page, status_id))
+    else:
+        await callback.message.answer(text, reply_markup=report_keyboard(page, status_id))
+
+
 @admin_router.callback_query(F.data.startswith("report_"))
 async def report_cmd(callback: types.CallbackQuery, session: AsyncSession):
     try:
@@ -25,13 +94,35 @@ async def report_cmd(callback: types.CallbackQuery, session: AsyncSession):
     except ValueError:
         await callback.message.answer("Неверный формат команды.")
         return
-    status = await orm_get_status(session, status_id)
-    header = f"📝 Отчёт по личному составу\nСтатус: {status.name}\n\n"
-    players = await orm_get_players(session, status_id)
-    if not players:
-        await callback.message.answer(header + "Нет игроков с этим статусом.")
-        return
-    players_list = "\n".join(
-        f"{p.name} | {p.count} | {p.direction.name}" for p in players
+    await send_report_page(callback, session, status_id)
+
+
+@admin_router.callback_query(PageCallBack.filter(F.list == "report"))
+async def report_page(
+    callback: types.CallbackQuery, callback_data: PageCallBack, session: AsyncSession
+):
+    await send_report_page(
+        callback, session, callback_data.status, callback_data.after, callback_data.before, edit=True
     )
-    await callback.message.answer(header + players_list)
+    await callback.answer()
+
+
+# Полная выгрузка: отчёт целиком несколькими сообщениями. Темп отправки задаёт
+# OutboundQueue (лимит на чат), своих пауз здесь нет
+@admin_router.callback_query(PageCallBack.filter(F.list == "report-all"))
+async def report_stream(
+    callback: types.CallbackQuery, callback_data: PageCallBack, session: AsyncSession
+):
+    await callback.answer()
+    header = await report_header(session, callback_data.status)
+    if header is None:
+        return
+    texts = []
+    async for page in orm_iter_report_pages(
+        session, callback_data.status, report_line, MESSAGE_LIMIT - len(header)
+    ):
+        texts.append("\n".join(report_line(p) for p in page.items))
+    # Всё прочитано — соединение с БД не держим, пока сообщения уходят по очереди
+    await session.close()
+    for number, text in enumerate(texts):
+        await callback.message.answer((header if number == 0 else "") + text)
@@ -1,4 +1,5 @@
 
+import logging
 
 from aiogram import F, Bot, types, Router
 from aiogram.filters import Command
@@ -7,6 +8,8 @@ from filters.chat_types import ChatTypeFilter
 
 
 
+logger = logging.getLogger(__name__)
+
 user_group_router = Router()
 user_group_router.message.filter(ChatTypeFilter(["group", "supergroup"]))
 user_group_router.edited_message.filter(ChatTypeFilter(["group", "supergroup"]))
@@ -14,13 +17,13 @@ user_group_router.edited_message.filter(ChatTypeFilter(["group", "supergroup"]))
 
 @user_group_router.message(Command("admin"))
 async def get_admins(message: types.Message, bot: Bot):
-    chat_id = message.chat.id
-    admins_list = await bot.get_chat_administrators(chat_id)
-    admins_list = [
-        member.user.id
-        for member in admins_list
-        if member.status == "creator" or member.status == "administrator"
-    ]
-    bot.my_admins_list = admins_list
+    # Админов берём только из групп, перечисленных в ADMIN_CHATS
+    if not bot.admin_registry.is_allowed(message.chat.id):
+        logger.warning(
+            "/admin из чата %s (пользователь %s) проигнорирован: чата нет в ADMIN_CHATS",
+            message.chat.id, message.from_user.id,
+        )
+        return
+    admins_list = await bot.admin_registry.refresh_chat(bot, message.chat.id)
     if message.from_user.id in admins_list:
         await message.delete()
\ No newline at end of file
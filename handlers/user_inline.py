@@ -0,0 +1,39 @@
+import html
+
+from aiogram import Router, types
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.orm_query import orm_get_card_catalog
+
+
+user_inline_router = Router()
+
+# Telegram отдаёт не больше 50 результатов за раз, дальше — по next_offset
+RESULTS_PER_PAGE = 50
+CACHE_TIME = 300
+
+
+# Поиск карт в любом чате: @bot T-7
+@user_inline_router.inline_query()
+async def inline_cards(inline_query: types.InlineQuery, session: AsyncSession):
+    catalog = await orm_get_card_catalog(session)
+    cards = catalog.search(inline_query.query)
+
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    page = cards[offset:offset + RESULTS_PER_PAGE]
+    next_offset = offset + RESULTS_PER_PAGE
+    results = [
+        types.InlineQueryResultCachedPhoto(
+            id=str(card.id),
+            photo_file_id=card.image,
+            title=card.name,
+            caption=html.escape(card.name),
+        )
+        for card in page
+    ]
+
+    await inline_query.answer(
+        results,
+        cache_time=CACHE_TIME,
+        next_offset=str(next_offset) if next_offset < len(cards) else "",
+    )
@@ -1,11 +1,10 @@
+import html
+
 from aiogram import F, types, Router
 from aiogram.filters import CommandStart
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.orm_query import (
-    orm_get_cards,
-    orm_get_card
-)
+from database.orm_query import orm_get_card_catalog
 
 from filters.chat_types import ChatTypeFilter
 
@@ -20,24 +19,24 @@ user_private_router.message.filter(ChatTypeFilter(["private"]))
 @user_private_router.message(CommandStart())
 @user_private_router.message(F.text == "Карты пробития")
 async def list_of_cards(message: types.Message, session: AsyncSession):
-    cards = await orm_get_cards(session)
-    if not cards:
+    catalog = await orm_get_card_catalog(session)
+    if not catalog.text:
         await message.answer("Список карт пуст.")
         return
 
-    text = "\n".join(card.name for card in cards)
     await message.answer(
         f"Вот список техники. Если хотите посмотреть что-то подробнее, "
-        f"напишите 'Карта_Название техники':\n\n{text}"
+        f"напишите 'Карта_Название техники':\n\n{catalog.text}"
     )
 
 # Показывает конкретную карту
 @user_private_router.message(F.text.startswith("Карта_"))
 async def card_show(message: types.Message, session: AsyncSession):
     name = message.text.removeprefix("Карта_").strip()
-    card = await orm_get_card(session, name)
+    catalog = await orm_get_card_catalog(session)
+    card = catalog.get(name)
 
     if card:
-        await message.answer_photo(card.image, caption=card.name)
+        await message.answer_photo(card.image, caption=html.escape(card.name))
     else:
         await message.answer("Карта с таким названием не найдена.")
\ No newline at end of file
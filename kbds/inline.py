@@ -206,6 +206,39 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
 
+
+
+class PageCallBack(CallbackData, prefix="page"):
+    list: str
+    status: int = 0
+    after: int | None = None
+    before: int | None = None
+
+
+# Кнопки карточек и игроков несут id, а не название: данные колбэка короткие
+# (лимит Telegram — 64 байта) и не ломаются на "_" в названии
+class CardCallBack(CallbackData, prefix="card"):
+    action: str
+    card_id: int
+
+
+class PlayerCallBack(CallbackData, prefix="player"):
+    action: str
+    player_id: int
+
+
+def get_page_btns(*, list_name: str, page, status: int = 0, btns: dict[str, str] | None = None):
+    keyboard = InlineKeyboardBuilder()
+    if page.has_previous:
+        keyboard.add(InlineKeyboardButton(text="◀️ Назад",
+                callback_data=PageCallBack(list=list_name, status=status, before=page.first).pack()))
+    if page.has_next:
+        keyboard.add(InlineKeyboardButton(text="Вперёд ▶️",
+                callback_data=PageCallBack(list=list_name, status=status, after=page.last).pack()))
+    keyboard.adjust(2)
+    if btns:
+        keyboard.row(*(InlineKeyboardButton(text=text, callback_data=data) for text, data in btns.items()))
+    return keyboard.as_markup()
 
 
 def get_callback_btns(
@@ -3,12 +3,37 @@ from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import Message, TelegramObject
 
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+class LazySession:
+    # Прокси для AsyncSession: настоящая сессия создаётся при первом обращении,
+    # апдейты, которым БД не нужна, её вообще не открывают
+    __slots__ = ('_session_pool', '_session')
+
+    def __init__(self, session_pool: async_sessionmaker):
+        self._session_pool = session_pool
+        self._session: AsyncSession | None = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._session_pool()
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
 
 
 class DataBaseSession(BaseMiddleware):
     def __init__(self, session_pool: async_sessionmaker):
         self.session_pool = session_pool
+        self.updates = 0
+        self.sessions_opened = 0
 
 
     async def __call__(
@@ -17,6 +42,16 @@ class DataBaseSession(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        async with self.session_pool() as session:
-            data['session'] = session
+        self.updates += 1
+        session = LazySession(self.session_pool)
+        data['session'] = session
+        try:
             return await handler(event, data)
+        finally:
+            if session.opened:
+                self.sessions_opened += 1
+                await session.close()
+
+    def stats(self) -> str:
+        share = self.sessions_opened / self.updates * 100 if self.updates else 0
+        return f'апдейтов: {self.updates}, с обращением к БД: {self.sessions_opened} ({share:.0f}%)'
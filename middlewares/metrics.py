@@ -0,0 +1,144 @@
+# Метрики обработки апдейтов: число апдейтов по типам, время каждого хендлера,
+# ошибки и распределение по состояниям FSM. Отдаются командой /stats и, если задан
+# порт, текстом в формате Prometheus по HTTP.
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiohttp import web
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+from utils.histogram import Histogram
+
+
+def handler_name(data: Dict[str, Any]) -> str:
+    handler = data.get("handler")
+    callback = getattr(handler, "callback", None)
+    if callback is None:
+        return "-"
+    module = callback.__module__.removeprefix("handlers.")
+    return f"{module}.{callback.__name__}"
+
+
+class MetricsMiddleware(BaseMiddleware):
+    def __init__(self):
+        self.started = time.time()
+        self.updates: dict[str, int] = {}
+        self.update_time = Histogram()
+        self.handlers: dict[str, Histogram] = {}
+        self.errors: dict[str, int] = {}
+        self.states: dict[str, int] = {}
+        self.gauges: dict[str, Callable[[], float]] = {}
+        self._runner: web.AppRunner | None = None
+
+    def register(self, dp: Dispatcher):
+        # Снаружи — на весь апдейт, внутри каждого типа событий — на выбранный хендлер
+        dp.update.outer_middleware(self)
+        for name, observer in dp.observers.items():
+            if name not in ("update", "error"):
+                observer.middleware(self)
+
+    def add_gauge(self, name: str, read: Callable[[], float]):
+        self.gauges[name] = read
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            kind = event.event_type
+            self.updates[kind] = self.updates.get(kind, 0) + 1
+            started = time.perf_counter()
+            try:
+                return await handler(event, data)
+            finally:
+                self.update_time.observe((time.perf_counter() - started) * 1000)
+
+        name = handler_name(data)
+        state = data.get("raw_state") or "-"
+        self.states[state] = self.states.get(state, 0) + 1
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            raise
+        finally:
+            histogram = self.handlers.get(name)
+            if histogram is None:
+                histogram = self.handlers[name] = Histogram()
+            histogram.observe((time.perf_counter() - started) * 1000)
+
+    def reset(self):
+        self.started = time.time()
+        self.updates.clear()
+        self.update_time = Histogram()
+        self.handlers.clear()
+        self.errors.clear()
+        self.states.clear()
+
+    def summary(self, limit: int = 15) -> str:
+        minutes = max((time.time() - self.started) / 60, 1 / 60)
+        total = sum(self.updates.values())
+        lines = [
+            f"Апдейтов: {total} ({total / minutes:.1f}/мин), "
+            f"p50 {self.update_time.quantile(0.5):.0f} мс, p95 {self.update_time.quantile(0.95):.0f} мс",
+            ", ".join(f"{kind}: {count}" for kind, count in sorted(self.updates.items())),
+            "",
+            f"{'хендлер':<34} {'N':>6} {'p50':>6} {'p95':>6} {'max':>7} {'ош':>4}",
+        ]
+        top = sorted(self.handlers.items(), key=lambda item: item[1].total, reverse=True)[:limit]
+        for name, h in top:
+            lines.append(
+                f"{name[-34:]:<34} {h.count:>6} {h.quantile(0.5):>6.0f} {h.quantile(0.95):>6.0f} "
+                f"{h.max:>7.0f} {self.errors.get(name, 0):>4}"
+            )
+        if self.states:
+            lines.append("")
+            lines.append("Состояния FSM: " + ", ".join(
+                f"{state}: {count}" for state, count in sorted(self.states.items(), key=lambda item: -item[1])
+            ))
+        for name, read in self.gauges.items():
+            lines.append(f"{name}: {read()}")
+        return "\n".join(lines)
+
+    # Формат Prometheus
+
+    def render(self) -> str:
+        lines = ["# TYPE bot_updates_total counter"]
+        lines += [f'bot_updates_total{{type="{kind}"}} {count}' for kind, count in self.updates.items()]
+        lines.append("# TYPE bot_handler_duration_ms histogram")
+        for name, h in self.handlers.items():
+            for bound, count in h.cumulative():
+                le = "+Inf" if bound == float("inf") else bound
+                lines.append(f'bot_handler_duration_ms_bucket{{handler="{name}",le="{le}"}} {count}')
+            lines.append(f'bot_handler_duration_ms_sum{{handler="{name}"}} {h.total:.3f}')
+            lines.append(f'bot_handler_duration_ms_count{{handler="{name}"}} {h.count}')
+        lines.append("# TYPE bot_handler_errors_total counter")
+        lines += [f'bot_handler_errors_total{{handler="{name}"}} {count}' for name, count in self.errors.items()]
+        lines.append("# TYPE bot_fsm_state_events_total counter")
+        lines += [f'bot_fsm_state_events_total{{state="{state}"}} {count}' for state, count in self.states.items()]
+        for name, read in self.gauges.items():
+            lines.append(f"# TYPE bot_{name} gauge")
+            lines.append(f"bot_{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.render(), content_type="text/plain")
+
+    async def start_http(self, host: str, port: int):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop_http(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+metrics = MetricsMiddleware()
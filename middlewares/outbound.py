@@ -0,0 +1,173 @@
+# Очередь исходящих сообщений: ограничение частоты по чату и в целом по боту,
+# склейка подряд идущих текстов в один чат и повтор после 429 (retry_after).
+# Подключается к сессии бота: bot.session.middleware(OutboundQueue())
+import asyncio
+import logging
+import time
+from collections import deque
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage,
+    EditMessageText,
+    ForwardMessage,
+    SendDocument,
+    SendMessage,
+    SendPhoto,
+    TelegramMethod,
+)
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 4096
+# Методы, на которые распространяются лимиты Telegram на отправку в чат
+LIMITED_METHODS = (SendMessage, SendPhoto, SendDocument, EditMessageText, CopyMessage, ForwardMessage)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class OutboundQueue(BaseRequestMiddleware):
+    def __init__(
+        self,
+        global_rate: float = 30,
+        private_rate: float = 1,
+        group_rate: float = 20 / 60,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+        coalesce: bool = True,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.coalesce = coalesce
+        self._buckets: dict[int | str, TokenBucket] = {}
+        self._queues: dict[int | str, deque] = {}
+        self._workers: dict[int | str, asyncio.Task] = {}
+        self.sent = 0
+        self.coalesced = 0
+        self.retries = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not isinstance(method, LIMITED_METHODS):
+            return await self._send(make_request, bot, method)
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(chat_id, deque()).append((make_request, bot, method, future))
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._drain(chat_id))
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "chats": len(self._queues),
+        }
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            # Отрицательные id (и @username) — группы и каналы, у них лимит строже
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.private_rate
+            bucket = self._buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    @staticmethod
+    def _can_merge(first: TelegramMethod, second: TelegramMethod) -> bool:
+        # Склеиваем только простые тексты с одинаковыми параметрами;
+        # клавиатура может быть только у последнего сообщения
+        if type(first) is not SendMessage or type(second) is not SendMessage:
+            return False
+        if first.reply_markup is not None or first.entities or second.entities:
+            return False
+        if len(first.text) + len(second.text) + 2 > MESSAGE_LIMIT:
+            return False
+        exclude = {"text", "reply_markup"}
+        return first.model_dump(exclude=exclude) == second.model_dump(exclude=exclude)
+
+    async def _drain(self, chat_id):
+        queue = self._queues[chat_id]
+        bucket = self._bucket(chat_id)
+        try:
+            while queue:
+                # Сначала ждём лимит: всё, что успеет прийти за это время, уйдёт одним сообщением
+                await bucket.acquire()
+                await self.global_bucket.acquire()
+
+                make_request, bot, method, future = queue.popleft()
+                futures = [future]
+                while self.coalesce and queue and self._can_merge(method, queue[0][2]):
+                    _, _, following, following_future = queue.popleft()
+                    method = method.model_copy(update={
+                        "text": f"{method.text}\n\n{following.text}",
+                        "reply_markup": following.reply_markup,
+                    })
+                    futures.append(following_future)
+                    self.coalesced += 1
+
+                try:
+                    result = await self._send(make_request, bot, method)
+                except Exception as error:
+                    for waiting in futures:
+                        if not waiting.done():
+                            waiting.set_exception(error)
+                else:
+                    for waiting in futures:
+                        if not waiting.done():
+                            waiting.set_result(result)
+        finally:
+            del self._workers[chat_id]
+            if not queue:
+                del self._queues[chat_id]
+                if bucket.full:
+                    self._buckets.pop(chat_id, None)
+
+    async def _send(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod):
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await make_request(bot, method)
+                self.sent += 1
+                return result
+            except TelegramRetryAfter as error:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                logger.warning("429 на %s, жду %s с", type(method).__name__, error.retry_after)
+                await asyncio.sleep(error.retry_after)
@@ -6,3 +6,6 @@ class AddCard(StatesGroup):
 
 class AddUser(StatesGroup):
     name = State()
+
+class ImportUsers(StatesGroup):
+    names = State()
@@ -0,0 +1,138 @@
+# FSM-хранилище в отдельном файле SQLite: переживает перезапуск бота.
+# Горячие ключи держим в памяти, записи на диск копятся и сбрасываются
+# одной транзакцией раз в flush_interval секунд.
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Mapping
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(self, path: str, flush_interval: float = 0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._states: dict[str, str | None] = {}
+        self._data: dict[str, dict[str, Any]] = {}
+        self._dirty: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+
+    # Работа с файлом — синхронная, вызывается через asyncio.to_thread
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fsm (key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _read(self, key: str):
+        with self._db_lock:
+            return self._connect().execute(
+                "SELECT state, data FROM fsm WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _write(self, upserts: list, deletes: list):
+        with self._db_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO fsm (key, state, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data",
+                    upserts,
+                )
+                conn.executemany("DELETE FROM fsm WHERE key = ?", deletes)
+
+    # Память
+
+    async def _load(self, key: StorageKey) -> str:
+        name = self.key_builder.build(key)
+        if name not in self._states:
+            row = await asyncio.to_thread(self._read, name)
+            # Пока ждали чтения, ключ мог заполниться другим апдейтом
+            if name not in self._states:
+                self._states[name] = row[0] if row else None
+                self._data[name] = json.loads(row[1]) if row else {}
+        return name
+
+    def _mark_dirty(self, name: str):
+        self._dirty.add(name)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        upserts, deletes = [], []
+        for name in dirty:
+            state, data = self._states.get(name), self._data.get(name, {})
+            if state is None and not data:
+                deletes.append((name,))
+                continue
+            try:
+                upserts.append((name, state, json.dumps(data, ensure_ascii=False)))
+            except TypeError:
+                logger.exception("FSM data for %s is not JSON serializable, kept in memory only", name)
+        try:
+            await asyncio.to_thread(self._write, upserts, deletes)
+        except BaseException:
+            self._dirty |= dirty
+            raise
+        # Пустые записи не держим и в памяти, если их не успели изменить заново
+        for (name,) in deletes:
+            if name not in self._dirty and self._states.get(name) is None and not self._data.get(name):
+                self._states.pop(name, None)
+                self._data.pop(name, None)
+
+    # BaseStorage
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        name = await self._load(key)
+        self._states[name] = state.state if isinstance(state, State) else state
+        self._mark_dirty(name)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        name = await self._load(key)
+        return self._states[name]
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        name = await self._load(key)
+        self._data[name] = data.copy()
+        self._mark_dirty(name)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        name = await self._load(key)
+        return self._data[name].copy()
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
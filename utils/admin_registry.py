@@ -0,0 +1,130 @@
+# Реестр админов: объединяет админов групп из списка разрешённых (ADMIN_CHATS), хранится
+# в JSON-файле и переживает перезапуск. Состав групп обновляется в фоне раз в ttl секунд.
+# Любую другую группу реестр игнорирует: иначе админом бота становится кто угодно,
+# добавив бота в свою группу.
+import asyncio
+import json
+import logging
+import os
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+logger = logging.getLogger(__name__)
+
+
+class AdminRegistry:
+    def __init__(self, path: str, allowed_chats, ttl: float = 600):
+        self.path = path
+        self.allowed_chats = frozenset(allowed_chats)
+        self.ttl = ttl
+        self._chats: dict[int, set[int]] = {}
+        self._refreshed: dict[int, float] = {}
+        self._admins: frozenset[int] = frozenset()
+        self._task: asyncio.Task | None = None
+        self._load()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._admins
+
+    def __len__(self) -> int:
+        return len(self._admins)
+
+    @property
+    def chats(self) -> list[int]:
+        return list(self._chats)
+
+    def is_allowed(self, chat_id: int) -> bool:
+        return chat_id in self.allowed_chats
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                chats = json.load(file)["chats"]
+        except (OSError, ValueError, KeyError):
+            logger.exception("Не удалось прочитать реестр админов %s", self.path)
+            return
+        # Группы, которых больше нет в ADMIN_CHATS, из файла не поднимаем
+        self._chats = {
+            int(chat_id): set(ids) for chat_id, ids in chats.items() if self.is_allowed(int(chat_id))
+        }
+        self._rebuild()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"chats": {str(k): sorted(v) for k, v in self._chats.items()}}, file)
+        os.replace(tmp_path, self.path)
+
+    def _rebuild(self):
+        self._admins = frozenset().union(*self._chats.values())
+
+    def set_chat(self, chat_id: int, admin_ids):
+        if not self.is_allowed(chat_id):
+            return
+        admin_ids = set(admin_ids)
+        self._refreshed[chat_id] = time.monotonic()
+        if self._chats.get(chat_id) == admin_ids:
+            return
+        self._chats[chat_id] = admin_ids
+        self._rebuild()
+        self._save()
+
+    def remove_chat(self, chat_id: int):
+        self._refreshed.pop(chat_id, None)
+        if self._chats.pop(chat_id, None) is not None:
+            self._rebuild()
+            self._save()
+
+    async def refresh_chat(self, bot: Bot, chat_id: int) -> set[int]:
+        if not self.is_allowed(chat_id):
+            return set()
+        try:
+            members = await bot.get_chat_administrators(chat_id)
+        except (TelegramForbiddenError, TelegramBadRequest):
+            # Бота убрали из группы — её админы больше не считаются админами бота
+            logger.warning("Чат %s недоступен, убираю его из реестра админов", chat_id)
+            self.remove_chat(chat_id)
+            return set()
+        admin_ids = {
+            member.user.id
+            for member in members
+            if member.status == "creator" or member.status == "administrator"
+        }
+        self.set_chat(chat_id, admin_ids)
+        return admin_ids
+
+    async def refresh_stale(self, bot: Bot):
+        now = time.monotonic()
+        for chat_id in self.allowed_chats:
+            if now - self._refreshed.get(chat_id, 0) >= self.ttl:
+                try:
+                    await self.refresh_chat(bot, chat_id)
+                except Exception:
+                    logger.exception("Не удалось обновить админов чата %s", chat_id)
+
+    async def _refresh_loop(self, bot: Bot):
+        while True:
+            await self.refresh_stale(bot)
+            await asyncio.sleep(self.ttl)
+
+    def start(self, bot: Bot):
+        if not self.allowed_chats:
+            logger.warning(
+                "ADMIN_CHATS не задан: у бота нет ни одного админа. "
+                "Укажите через запятую id групп, админы которых управляют ботом"
+            )
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop(bot))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
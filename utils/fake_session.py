@@ -0,0 +1,56 @@
+# Подмена HTTP-сессии бота для прогонов без сети: запросы к Bot API не уходят
+# в Telegram, а записываются и получают правдоподобный ответ.
+import asyncio
+import datetime
+import itertools
+from typing import Any, AsyncGenerator
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message, User
+
+
+class FakeSession(BaseSession):
+    def __init__(self, latency: float = 0, flood_every: int = 0, retry_after: int = 1):
+        # latency — задержка каждого запроса, flood_every — каждый N-й запрос отвечает 429
+        super().__init__()
+        self.latency = latency
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.requests: list[TelegramMethod] = []
+        self._calls = 0
+        self._message_ids = itertools.count(1)
+
+    async def close(self) -> None:
+        pass
+
+    async def stream_content(self, url: str, *args: Any, **kwargs: Any) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: int | None = None) -> Any:
+        self._calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.flood_every and self._calls % self.flood_every == 0:
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=self.retry_after)
+        self.requests.append(method)
+        return self._result(bot, method)
+
+    def _result(self, bot: Bot, method: TelegramMethod) -> Any:
+        returning = getattr(method, "__returning__", None)
+        if returning is Message:
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.datetime.now(),
+                chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type="private"),
+                from_user=User(id=bot.id, is_bot=True, first_name="bot"),
+                text=getattr(method, "text", None),
+            )
+        if returning is User:
+            return User(id=bot.id, is_bot=True, first_name="bot", username="bot")
+        if returning is list or getattr(returning, "__origin__", None) is list:
+            return []
+        return True
@@ -0,0 +1,207 @@
+# Нечёткий поиск позывных: триграммы + ограниченное расстояние Левенштейна
+from collections import Counter
+from itertools import combinations, islice
+from typing import Container
+
+# Кириллические буквы, которые выглядят как латинские (после casefold)
+HOMOGLYPHS = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h",
+    "о": "o", "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i",
+    "ї": "i", "ј": "j", "ѕ": "s",
+})
+
+
+# Сколько позывных набираем из списков триграмм, прежде чем отбросить остальные:
+# частые триграммы вроде «^us» есть у тысяч позывных и только замедляют поиск
+MAX_CANDIDATES = 100
+# Из скольких самых редких триграмм составляем пары, если каждая по отдельности частая
+RARE_GRAMS = 5
+EMPTY: frozenset[int] = frozenset()
+
+
+def fold(name: str) -> str:
+    return name.casefold().translate(HOMOGLYPHS).strip()
+
+
+def fold_case(name: str) -> str:
+    return name.casefold().strip()
+
+
+def trigrams(folded: str) -> set[str]:
+    padded = f"^{folded}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def char_masks(a: str) -> dict[str, int]:
+    # Для каждой буквы — битовая маска её позиций в a
+    masks: dict[str, int] = {}
+    for i, char in enumerate(a):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def bounded_distance(a: str, b: str, limit: int, masks: dict[str, int] | None = None) -> int:
+    # Левенштейн битовым алгоритмом Майерса: столбец по a хранится битами int,
+    # каждая буква b — несколько операций над ним. Возвращает limit + 1, если
+    # расстояние больше limit; выходит раньше, когда оставшиеся буквы уже не помогут.
+    # masks = char_masks(a) можно посчитать один раз на много сравнений с одним a
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a:
+        return min(len(b), limit + 1)
+    if masks is None:
+        masks = char_masks(a)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    plus, minus, distance = full, 0, len(a)
+    remaining = len(b)
+    for char in b:
+        remaining -= 1
+        match = masks.get(char, 0)
+        diagonal = (((match & plus) + plus) ^ plus) | match | minus
+        up = minus | (~(diagonal | plus) & full)
+        down = diagonal & plus
+        if up & last:
+            distance += 1
+        elif down & last:
+            distance -= 1
+        up = ((up << 1) | 1) & full
+        minus = up & diagonal
+        plus = ((down << 1) & full) | (~(up | diagonal) & full)
+        if distance - remaining > limit:
+            return limit + 1
+    return min(distance, limit + 1)
+
+
+class CallsignIndex:
+    def __init__(self, names=()):
+        self._slots: dict[str, int] = {}  # позывной -> слот
+        self._names: dict[int, str] = {}
+        self._folded: dict[int, str] = {}
+        self._cases: dict[str, set[int]] = {}  # позывной без регистра -> слоты
+        self._grams: dict[tuple[str, int], set[int]] = {}  # (триграмма, длина) -> слоты
+        self._next_slot = 0
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, name: str):
+        if name in self._slots:
+            return
+        slot = self._next_slot
+        self._next_slot += 1
+        folded = fold(name)
+        self._slots[name] = slot
+        self._names[slot] = name
+        self._folded[slot] = folded
+        self._cases.setdefault(fold_case(name), set()).add(slot)
+        for gram in trigrams(folded):
+            self._grams.setdefault((gram, len(folded)), set()).add(slot)
+
+    def remove(self, name: str):
+        slot = self._slots.pop(name, None)
+        if slot is None:
+            return
+        del self._names[slot]
+        folded = self._folded.pop(slot)
+        self._discard(self._cases, fold_case(name), slot)
+        for gram in trigrams(folded):
+            self._discard(self._grams, (gram, len(folded)), slot)
+
+    @staticmethod
+    def _discard(postings: dict, key: str, slot: int):
+        slots = postings.get(key)
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del postings[key]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        max_distance: int | None = None,
+        allowed: Container[str] | None = None,
+    ) -> list[tuple[str, int]]:
+        # Список (позывной, расстояние), лучшие совпадения первыми
+        folded = fold(query)
+        if not folded:
+            return []
+        if max_distance is None:
+            # На коротких позывных две правки дают уже случайные совпадения
+            max_distance = 1 if len(folded) <= 5 else 2
+        size = len(folded)
+        # Списки триграмм разбиты по длине позывного: дальше max_distance по длине не смотрим
+        lengths = range(max(1, size - max_distance), size + max_distance + 1)
+        postings = {
+            gram: [self._grams.get((gram, length), EMPTY) for length in lengths]
+            for gram in trigrams(folded)
+        }
+        # Одна правка портит не больше трёх триграмм, поэтому совпадение делит с запросом
+        # хотя бы needed триграмм и обязательно встречается среди самых редких
+        # len(grams) - needed + 1 из них. Идём от редких к частым, пока кандидатов немного
+        grams = sorted(postings, key=lambda gram: sum(map(len, postings[gram])))
+        needed = max(1, size - 3 * max_distance)
+
+        # allowed проверяем сразу, до ограничения числа кандидатов:
+        # иначе чужие позывные вытесняют подходящие
+        def admitted(slots):
+            if allowed is None:
+                return slots
+            return (slot for slot in slots if self._names[slot] in allowed)
+
+        candidates: set[int] = set()
+        grams_left = True
+        for gram in grams[:max(1, len(grams) - needed + 1)]:
+            found = sum(map(len, postings[gram]))
+            if len(candidates) + found > MAX_CANDIDATES:
+                break
+            for slots in postings[gram]:
+                candidates.update(admitted(slots))
+        else:
+            grams_left = False
+        if grams_left:
+            # Остальные триграммы слишком частые (user1, user2, …): добираем позывные,
+            # у которых совпали хотя бы две из самых редких триграмм
+            for first, second in combinations(grams[:RARE_GRAMS], 2):
+                for one, other in zip(postings[first], postings[second]):
+                    candidates.update(islice(admitted(one & other), MAX_CANDIDATES - len(candidates)))
+                if len(candidates) >= MAX_CANDIDATES:
+                    break
+
+        shared = Counter()
+        for gram in grams:
+            for slots in postings[gram]:
+                if slots:
+                    shared.update(candidates & slots)
+        # Нижняя граница расстояния по общим триграммам: идём от лучших кандидатов и
+        # останавливаемся, когда граница не лучше уже найденного limit-го совпадения
+        ranked = []
+        for slot, common in shared.items():
+            length = len(self._folded[slot])
+            missing = max(size, length) - common
+            if missing <= 3 * max_distance:
+                ranked.append((max(-(-missing // 3), abs(length - size)), -common, slot))
+        ranked.sort()
+
+        masks = char_masks(folded)
+        scored = []
+        for bound, common, slot in ranked:
+            if len(scored) >= limit and bound >= scored[limit - 1][0]:
+                break
+            distance = bounded_distance(folded, self._folded[slot], max_distance, masks)
+            if distance <= max_distance:
+                scored.append((distance, common, self._names[slot]))
+                scored.sort()
+        return [(name, distance) for distance, _, name in scored[:limit]]
+
+    def resolve(self, query: str, allowed: Container[str] | None = None) -> str | None:
+        # Однозначное совпадение с точностью до регистра. Похожие буквы (Вова/Boba) здесь
+        # не сворачиваем — это другой игрок, такие совпадения идут только в подсказки
+        slots = self._cases.get(fold_case(query), ())
+        if len(slots) != 1:
+            return None
+        name = self._names[next(iter(slots))]
+        return name if allowed is None or name in allowed else None
@@ -0,0 +1,46 @@
+# Гистограмма времени выполнения с фиксированными корзинами (в миллисекундах).
+# Память не растёт с числом наблюдений, квантили — оценка по границам корзин.
+from bisect import bisect_left
+
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets: tuple = BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя — всё, что больше верхней границы
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative(self):
+        # (верхняя граница, число наблюдений не больше неё) — как у Prometheus
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            yield bound, seen
+        yield float("inf"), self.count
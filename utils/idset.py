@@ -0,0 +1,53 @@
+# Компактное множество id игроков: битовая маска, хранится в FSM как строка "база:hex".
+# Биты отсчитываются от минимального id (базы), поэтому размер зависит от разброса id,
+# а не от их величины: id из Postgres-последовательности около 5 000 000 не раздувают маску.
+# Строка неизменяема, поэтому get_data/update_data её не копируют.
+from typing import Iterable, Iterator
+
+# (база, биты): бит i означает id = база + i
+Mask = tuple[int, int]
+
+
+def _bits(ids: Iterable[int], base: int) -> int:
+    ids = [id_ - base for id_ in ids if id_ >= base]
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for offset in ids:
+        buf[offset >> 3] |= 1 << (offset & 7)
+    return int.from_bytes(buf, "little")
+
+
+def pack(ids: Iterable[int]) -> str:
+    ids = list(ids)
+    if not ids:
+        return "0"
+    base = min(ids)
+    return f"{base}:{_bits(ids, base):x}"
+
+
+def unpack(packed: str) -> Mask:
+    # Маски без базы (сохранённые до её появления) отсчитываются от нуля
+    base, _, bits = packed.rpartition(":")
+    return int(base or 0), int(bits, 16)
+
+
+def contains(mask: Mask, id_: int) -> bool:
+    base, bits = mask
+    return id_ >= base and (bits >> (id_ - base)) & 1 == 1
+
+
+def difference(mask: Mask, ids: Iterable[int]) -> Mask:
+    # Маска без перечисленных id — одна операция над int вместо цикла по маске
+    base, bits = mask
+    return base, bits & ~_bits(ids, base)
+
+
+def iter_ids(mask: Mask) -> Iterator[int]:
+    # По возрастанию id, за один проход по двоичной записи
+    base, bits = mask
+    digits = bin(bits)[:1:-1]
+    index = digits.find("1")
+    while index != -1:
+        yield base + index
+        index = digits.find("1", index + 1)
@@ -1,5 +1,8 @@
 # Простой пагинатор
 import math
+from dataclasses import dataclass
+
+from sqlalchemy import select
 
 
 class Paginator:
@@ -42,3 +45,90 @@ class Paginator:
             return self.__get_slice()
         raise IndexError(f'Previous page does not exist. Use has_previous() to check before.')
 
+
+# Пагинатор по БД: выбирает только строки текущей страницы через keyset (seek),
+# без OFFSET и без загрузки всей таблицы. Курсор — id первой/последней строки страницы.
+@dataclass
+class KeysetPage:
+    items: list
+    first: int | None
+    last: int | None
+    has_next: bool
+    has_previous: bool
+
+
+class KeysetPaginator:
+    def __init__(
+        self,
+        query,
+        id_column,
+        order_column=None,
+        per_page: int = 20,
+        render=None,
+        max_chars: int | None = None,
+    ):
+        # В запросе должна быть колонка с меткой id. order_column должна быть уникальной.
+        # С max_chars страница дополнительно обрезается так, чтобы строки render(row)
+        # вместе уложились в max_chars символов (лимит сообщения Telegram).
+        self.query = query
+        self.id_column = id_column
+        self.order_column = order_column if order_column is not None else id_column
+        self.per_page = per_page
+        self.render = render
+        self.max_chars = max_chars
+
+    def _fit(self, rows: list) -> list:
+        total = 0
+        for index, row in enumerate(rows):
+            total += len(self.render(row)) + 1
+            if index and total > self.max_chars:
+                return rows[:index]
+        return rows
+
+    def _cursor_key(self, cursor: int):
+        if self.order_column is self.id_column:
+            return cursor
+        return select(self.order_column).where(self.id_column == cursor).scalar_subquery()
+
+    async def get_page(self, session, after: int | None = None, before: int | None = None) -> KeysetPage:
+        query = self.query
+        if before is not None:
+            query = query.where(self.order_column < self._cursor_key(before))
+            query = query.order_by(self.order_column.desc())
+        else:
+            if after is not None:
+                query = query.where(self.order_column > self._cursor_key(after))
+            query = query.order_by(self.order_column)
+
+        rows = (await session.execute(query.limit(self.per_page + 1))).all()
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if self.max_chars is not None:
+            fitted = self._fit(rows)
+            more = more or len(fitted) < len(rows)
+            rows = fitted
+
+        if before is not None:
+            rows.reverse()
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, after is not None
+
+        if not rows and (after is not None or before is not None):
+            # Курсорную строку удалили — начинаем сначала
+            return await self.get_page(session)
+
+        return KeysetPage(
+            items=rows,
+            first=rows[0].id if rows else None,
+            last=rows[-1].id if rows else None,
+            has_next=has_next,
+            has_previous=has_previous,
+        )
+
+    async def iter_pages(self, session):
+        page = await self.get_page(session)
+        yield page
+        while page.has_next:
+            page = await self.get_page(session, after=page.last)
+            yield page
@@ -0,0 +1,77 @@
+# Разбор списка позывных для массового импорта: текст сообщения или файл CSV/TXT
+import csv
+import io
+import re
+from itertools import chain
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator
+
+SEPARATORS = re.compile(r"[,;\t\r\n]")
+FORBIDDEN = re.compile(r"[,;\t]")
+# Заголовок первой колонки выгрузки — такую строку пропускаем
+HEADERS = {"позывной", "позывные", "ник", "игрок", "имя", "callsign", "nickname", "name", "player"}
+
+
+@dataclass
+class ImportReport:
+    added: int = 0
+    skipped: int = 0  # уже есть в базе или повтор в самом списке
+    conflicted: int = 0  # не вставились из-за ограничения уникальности
+    invalid: int = 0  # не прошли проверку длины или содержат , ; tab
+
+    def text(self) -> str:
+        return (
+            "Импорт завершён.\n"
+            f"Добавлено: {self.added}\n"
+            f"Пропущено (уже есть): {self.skipped}\n"
+            f"Конфликтов: {self.conflicted}\n"
+            f"Некорректных: {self.invalid}"
+        )
+
+
+def iter_names(lines: Iterable[str]) -> Iterator[str]:
+    # Текст или TXT: построчно, без загрузки всего списка в память; в строке может быть
+    # несколько позывных через запятую, точку с запятой или табуляцию
+    for line in lines:
+        for part in SEPARATORS.split(line):
+            name = part.strip().strip('"').strip()
+            if name:
+                yield name
+
+
+def iter_csv_names(lines: Iterable[str]) -> Iterator[str]:
+    # Выгрузка таблицы: позывной — первая колонка, остальные (статус, направление) не нужны.
+    # Кавычки и запятые внутри ячеек разбирает csv; разделитель (, ; или tab) — по первой строке
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    try:
+        dialect = csv.Sniffer().sniff(first, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    for number, row in enumerate(csv.reader(chain([first], lines), dialect)):
+        name = row[0].strip() if row else ""
+        if number == 0 and name.casefold() in HEADERS:
+            continue
+        if name:
+            yield name
+
+
+def iter_callsigns(names: Iterable[str], report: ImportReport | None = None) -> Iterator[str]:
+    for name in names:
+        # Позывной с разделителем (из ячейки CSV в кавычках) потом не ввести в Контроле списком
+        if not (3 <= len(name) <= 150) or FORBIDDEN.search(name):
+            if report is not None:
+                report.invalid += 1
+            continue
+        yield name
+
+
+def split_names(text: str) -> list[str]:
+    return list(iter_names(text.splitlines()))
+
+
+def iter_file_lines(file: BinaryIO) -> Iterator[str]:
+    # utf-8-sig — чтобы не тащить BOM из Excel в первый позывной
+    yield from io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace")
@@ -0,0 +1,151 @@
+# Параллельная обработка апдейтов с сохранением порядка для каждого пользователя.
+# У каждого ключа (id пользователя) своя очередь; ограниченный пул воркеров
+# берёт ключи по кругу, так что длинный отчёт одного админа не держит
+# остальных, а его собственные апдейты идут строго друг за другом.
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+
+class KeyedScheduler:
+    def __init__(self, workers: int = 8):
+        self.workers = workers
+        self._queues: dict[Hashable, deque] = {}
+        self._ready: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.busy = 0
+        self.processed = 0
+        self.max_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._ready = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def drain(self, timeout: float | None = None) -> bool:
+        # Ждём, пока воркеры разберут всё, что уже стоит в очередях
+        if not self._tasks:
+            return not self._queues
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def stop(self, timeout: float = 0):
+        # Сначала даём доработать очередь (до timeout секунд), потом снимаем воркеры
+        if timeout:
+            await self.drain(timeout)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for queue in self._queues.values():
+            for _, _, future in queue:
+                if not future.done():
+                    future.cancel()
+        self._queues.clear()
+        self._idle.set()
+
+    def submit(self, key: Hashable, job: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(key)
+        if queue is None:
+            # Ключ новый — ставим его в очередь на обработку; иначе он уже там
+            # или его обрабатывает воркер, который сам вернёт его в очередь
+            queue = self._queues[key] = deque()
+            self._ready.put_nowait(key)
+            self._idle.clear()
+        queue.append((job, time.monotonic(), future))
+        self.max_depth = max(self.max_depth, len(queue))
+        return future
+
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            job, queued_at, future = queue.popleft()
+            wait = time.monotonic() - queued_at
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.busy += 1
+            try:
+                if not future.done():
+                    future.set_result(await job())
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            finally:
+                self.busy -= 1
+                self.processed += 1
+                # Следующий апдейт этого ключа — в конец общей очереди, за другими ключами
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._queues[key]
+                    if not self._queues:
+                        self._idle.set()
+
+    def depth(self, key: Hashable) -> int:
+        queue = self._queues.get(key)
+        return len(queue) if queue else 0
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "busy": self.busy,
+            "keys": len(self._queues),
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "max_depth": self.max_depth,
+            "processed": self.processed,
+            "wait_avg_ms": round(self.wait_total / self.processed * 1000, 1) if self.processed else 0,
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+        }
+
+
+def update_key(update: Update) -> Hashable | None:
+    # Порядок нужен в пределах одного пользователя: его FSM не должна видеть
+    # апдейты вперемешку. Без пользователя (посты в каналах) — по чату.
+    event = update.event
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return "user", user.id
+    chat = getattr(event, "chat", None)
+    if chat is not None:
+        return "chat", chat.id
+    return None
+
+
+class OrderedDispatcher(Dispatcher):
+    # Dispatcher, который пропускает каждый апдейт через KeyedScheduler.
+    # Работает и с polling, и с вебхуком: оба вызывают feed_update.
+    def __init__(self, *args: Any, workers: int = 8, drain_timeout: float = 10, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.scheduler = KeyedScheduler(workers)
+        self.drain_timeout = drain_timeout
+
+    async def emit_shutdown(self, *args: Any, **kwargs: Any) -> None:
+        # Dispatcher.__init__ первым в shutdown ставит fsm.close, поэтому очередь апдейтов
+        # дорабатываем до него: иначе последние правки Контроля пишутся в закрытое хранилище
+        await self.scheduler.stop(self.drain_timeout)
+        await super().emit_shutdown(*args, **kwargs)
+
+    async def feed_update(self, bot: Bot, update: Update, **kwargs: Any) -> Any:
+        key = update_key(update)
+        if key is None:
+            return await super().feed_update(bot, update, **kwargs)
+        parent = super().feed_update
+        return await self.scheduler.submit(key, lambda: parent(bot, update, **kwargs))
@@ -0,0 +1,89 @@
+# Режим вебхука: aiohttp-сервер принимает апдейты от Telegram (или от обратного прокси)
+# вместо long polling. Число одновременно обрабатываемых апдейтов ограничено.
+import asyncio
+import logging
+import secrets
+from typing import Any
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    # Апдейт обрабатывается в фоне, Telegram сразу получает 200.
+    # Когда все max_tasks слотов заняты, следующий запрос ждёт свободного слота,
+    # а не плодит задачи без ограничения — Telegram сам придержит отправку.
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_tasks: int = 100, **kwargs: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, **kwargs)
+        self.max_tasks = max_tasks
+        self._slots = asyncio.Semaphore(max_tasks)
+        self.received = 0
+
+    @property
+    def active(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        self.received += 1
+        await self._slots.acquire()
+        task = asyncio.create_task(self._bounded_feed_update(bot, update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._background_feed_update_tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _bounded_feed_update(self, bot: Bot, update: dict[str, Any]):
+        try:
+            await self._background_feed_update(bot, update)
+        finally:
+            self._slots.release()
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot, path: str, secret: str, max_tasks: int):
+    # Без секрета SimpleRequestHandler принимает любой POST: кто достучится до порта,
+    # подделает апдейт от имени админа
+    if not secret:
+        raise ValueError("Вебхук без секретного токена не запускается")
+    app = web.Application()
+    handler = BoundedRequestHandler(dp, bot, max_tasks=max_tasks, secret_token=secret)
+    handler.register(app, path=path)
+    # startup/shutdown диспетчера вызываются вместе с приложением aiohttp
+    setup_application(app, dp, bot=bot)
+    app["webhook_handler"] = handler
+    return app
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    url: str,
+    secret: str | None = None,
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    path: str = "/webhook",
+    max_tasks: int = 100,
+    allowed_updates: list[str] | None = None,
+):
+    if not secret:
+        # Секрет не задан — генерируем на этот запуск, Telegram получит его в set_webhook
+        secret = secrets.token_urlsafe(32)
+        logger.warning("WEBHOOK_SECRET не задан, используется случайный секрет на этот запуск")
+    app = build_webhook_app(dp, bot, path, secret, max_tasks)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    await bot.set_webhook(
+        url,
+        secret_token=secret,
+        allowed_updates=allowed_updates,
+        drop_pending_updates=True,
+        max_connections=min(max_tasks, 100),
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()